@@ -9,15 +9,68 @@ class Settings(BaseSettings):
     secret_key: str = "dev-secret-key"
     debug: bool = True
 
-    # Rate limiting
+    # Rate limiting (starting values; adjustable at runtime via PUT /api/admin/rate-limits/{name})
     autocomplete_requests_per_minute: int = 30
     trends_requests_per_minute: int = 10
     serp_requests_per_minute: int = 10
     competitor_requests_per_minute: int = 5
+    # Requests that may go out back to back after an idle spell
+    autocomplete_burst: int = 3
+    trends_burst: int = 2
+    serp_burst: int = 2
+    competitor_burst: int = 1
+    # "memory": each process has its own buckets; "sqlite": all processes on the
+    # database share one bucket per upstream (needed with several web/worker processes).
+    # Unset: sqlite when jobs run in a separate worker (run_background_jobs=false, or
+    # the worker itself), memory for a single all-in-one process.
+    rate_limit_backend: str = ""
+
+    # Daily Trends refresh: requests (4 keywords + anchor each) the planner may spend per run
+    trends_daily_request_budget: int = 60
+
+    # Google Trends worker pool: each thread keeps one pytrends session (cookie handshake)
+    trends_workers: int = 2
+    trends_session_max_age: float = 1800.0  # seconds before a session is rebuilt
+    trends_session_max_errors: int = 3  # consecutive failures before a session is rebuilt
+    # Included in every batched Trends request so scores from different batches share a scale
+    trends_anchor_keyword: str = "ai video generator"
+    # Anchored score = interest relative to the anchor's mean x this, capped at 100 (anchor itself = 25)
+    trends_anchor_scale: float = 25.0
+    trends_cache_ttl_hours: float = 12.0  # identical (keywords, timeframe, geo) requests reuse results
+    trends_series_ttl_hours: float = 12.0  # batched runs reuse a keyword's series fetched with the same anchor
 
     # Expansion
     max_expansion_depth: int = 2
     top_n_for_recursive: int = 5
+    seed_freshness_hours: float = 24.0  # re-expanding a seed within this window reuses past results
+
+    # Trending page sources (Google RSS, Reddit, trends24.in), cached in memory
+    trending_cache_ttl: float = 600.0  # seconds before a source is refreshed in the background
+    trending_retry_after: float = 60.0  # seconds before retrying a source whose fetch failed
+    # Seconds to wait for each source before answering without it
+    trending_source_deadlines: dict[str, float] = {"google": 8.0, "reddit": 8.0, "twitter": 10.0}
+
+    # Scheduled trending discovery
+    discovery_concurrency: int = 5  # terms expanded at once (upstream limiters set the pace)
+    discovery_term_timeout: float = 900.0  # seconds before a single term's expansion is abandoned
+
+    # Job queue
+    run_background_jobs: bool = True  # False when a separate `python -m backend.worker` runs jobs
+    job_workers: int = 4  # concurrent jobs per process
+    job_interactive_workers: int = 1  # extra workers per process that only run interactive jobs
+    job_poll_interval: float = 5.0  # seconds between queue polls when idle
+    job_heartbeat_interval: float = 30.0  # running jobs are requeued after 4 missed heartbeats
+    job_max_attempts: int = 3  # requeue interrupted jobs at most this many times
+    # Wall-clock limit per job type (seconds); jobs wind down at their next checkpoint
+    job_timeouts: dict[str, float] = {"expansion": 1800, "competitor_crawl": 3600}
+    job_retention_days: int = 30  # finished jobs older than this move to collection_jobs_archive
+
+    # Trend snapshot compaction: full resolution, then weekly, then monthly averages
+    snapshot_raw_days: int = 90
+    snapshot_weekly_days: int = 730
+
+    # Scheduler leader election (one process runs scheduled jobs)
+    leader_lease_ttl: float = 60.0  # seconds; renewed every ttl/3
 
     model_config = {"env_file": str(BASE_DIR / ".env")}
 
@@ -1,9 +1,30 @@
+import logging
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
 from backend.config import settings
 
-engine = create_async_engine(settings.database_url, echo=settings.debug)
+logger = logging.getLogger(__name__)
+
+# Web and worker processes share the SQLite file. WAL lets readers run alongside
+# the writer, and a busy timeout makes a contended write wait for the lock
+# instead of failing with "database is locked" after pysqlite's 5 s default.
+SQLITE_BUSY_TIMEOUT_MS = 30000
+
+engine = create_async_engine(
+    settings.database_url,
+    echo=settings.debug,
+    connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000} if settings.database_url.startswith("sqlite") else {},
+)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -19,3 +40,46 @@ async def get_db():
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def run_migrations():
+    """Add new columns and indexes that may not exist in older DBs."""
+    migrations = [
+        ("keywords", "cpc", "REAL"),
+        ("keywords", "competition_index", "INTEGER"),
+        ("keywords", "monthly_searches", "TEXT"),
+        ("collection_jobs", "params", "TEXT"),
+        ("collection_jobs", "attempts", "INTEGER DEFAULT 0"),
+        ("collection_jobs", "claimed_by", "VARCHAR(100)"),
+        ("collection_jobs", "heartbeat_at", "DATETIME"),
+        ("keywords", "trends_refreshed_at", "DATETIME"),
+        ("collection_jobs", "cancel_requested", "BOOLEAN DEFAULT 0"),
+        ("keywords", "rise_percentage", "REAL"),
+        ("trend_snapshots", "resolution", "VARCHAR(10) DEFAULT 'raw'"),
+        ("collection_jobs", "priority", "INTEGER DEFAULT 1"),
+        ("rate_limit_buckets", "target_rate", "REAL"),
+        ("seed_expansions", "autocomplete_job_id", "INTEGER"),
+        ("seed_expansions", "trends_job_id", "INTEGER"),
+        ("seed_expansions", "serp_job_id", "INTEGER"),
+    ]
+    async with engine.begin() as conn:
+        for table, col, typedef in migrations:
+            try:
+                await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {typedef}"))
+                logger.info(f"Migration: added column {table}.{col}")
+            except Exception:
+                pass  # column already exists
+
+    # create_all only builds indexes for tables it creates
+    indexes = [
+        ("ix_collection_jobs_created", "collection_jobs", "created_at"),
+        ("ix_collection_jobs_status_created", "collection_jobs", "status, created_at"),
+        ("ix_collection_jobs_type_created", "collection_jobs", "job_type, created_at"),
+        ("ix_collection_jobs_status_priority", "collection_jobs", "status, priority, id"),
+        ("ix_collection_jobs_status_completed", "collection_jobs", "status, completed_at"),
+        ("ix_collection_jobs_seed", "collection_jobs", "seed_keyword COLLATE NOCASE"),
+        ("ix_trend_snapshots_keyword_date", "trend_snapshots", "keyword_id, snapshot_date"),
+    ]
+    async with engine.begin() as conn:
+        for name, table, cols in indexes:
+            await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols})"))
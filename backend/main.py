@@ -6,19 +6,22 @@ from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import select, text
+from sqlalchemy import select
 
-from backend.database import init_db, async_session, engine
+from backend.database import init_db, run_migrations, async_session
 from backend.models import *  # noqa: ensure all models registered
 from backend.models.template_category import TemplateCategory
 from backend.models.competitor import Competitor
 from backend.models.keyword import Keyword
 from backend.routers import keywords, trends, competitors, dashboard, jobs, admin
 from backend.tasks.scheduler import setup_scheduler, shutdown_scheduler
+from backend.tasks.job_queue import job_queue
 from backend.utils.seed_data import TEMPLATE_CATEGORIES, PRESET_COMPETITORS
-from backend.config import SEED_KEYWORDS
+from backend.config import settings, SEED_KEYWORDS
 from backend.services.keyword_classifier import classify_keyword
 from backend.services.heat_ranker import calculate_heat_score
+from backend.services.google_trends import trends_sessions
+from backend.services.trending_discovery import trending_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,33 +31,25 @@ TEMPLATES_DIR = BASE_DIR / "frontend" / "templates"
 STATIC_DIR = BASE_DIR / "frontend" / "static"
 
 
-async def run_migrations():
-    """Add new columns that may not exist in older DBs."""
-    migrations = [
-        ("cpc", "REAL"),
-        ("competition_index", "INTEGER"),
-        ("monthly_searches", "TEXT"),
-    ]
-    async with engine.begin() as conn:
-        for col, typedef in migrations:
-            try:
-                await conn.execute(text(f"ALTER TABLE keywords ADD COLUMN {col} {typedef}"))
-                logger.info(f"Migration: added column keywords.{col}")
-            except Exception:
-                pass  # column already exists
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
     await run_migrations()
     await seed_initial_data()
-    setup_scheduler()
+    # Background work runs here unless a separate `python -m backend.worker` handles it
+    if settings.run_background_jobs:
+        await job_queue.start()
+        await setup_scheduler()
+    trending_cache.start()
     logger.info("SEO Keyword Platform started")
     yield
     # Shutdown
-    shutdown_scheduler()
+    await trending_cache.stop()
+    if settings.run_background_jobs:
+        await shutdown_scheduler()
+        await job_queue.stop()
+    trends_sessions.shutdown()
 
 
 app = FastAPI(title="SEO Keyword Platform", lifespan=lifespan)
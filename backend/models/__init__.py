@@ -1,12 +1,19 @@
 from backend.models.keyword import Keyword, KeywordCategoryMap
 from backend.models.trend_snapshot import TrendSnapshot
+from backend.models.trend_series import TrendSeries
 from backend.models.competitor import Competitor, CompetitorPage
 from backend.models.competitor_keyword import CompetitorKeyword
 from backend.models.template_category import TemplateCategory
-from backend.models.collection_job import CollectionJob
+from backend.models.collection_job import CollectionJob, CollectionJobArchive
+from backend.models.leader_lease import LeaderLease
+from backend.models.rate_limit_bucket import RateLimitBucket
+from backend.models.seed_expansion import SeedExpansion
+from backend.models.trends_cache import TrendsCacheEntry, TrendsAnchorSeries
 
 __all__ = [
-    "Keyword", "KeywordCategoryMap", "TrendSnapshot",
+    "Keyword", "KeywordCategoryMap", "TrendSnapshot", "TrendSeries",
     "Competitor", "CompetitorPage", "CompetitorKeyword",
-    "TemplateCategory", "CollectionJob",
+    "TemplateCategory", "CollectionJob", "CollectionJobArchive",
+    "LeaderLease", "RateLimitBucket", "SeedExpansion",
+    "TrendsCacheEntry", "TrendsAnchorSeries",
 ]
@@ -1,19 +1,47 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, Index, text
 from backend.database import Base
 
 
-class CollectionJob(Base):
-    __tablename__ = "collection_jobs"
+class CollectionJobColumns:
+    """Columns shared by live jobs and their archive."""
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     job_type = Column(String(50), nullable=False)  # expansion, trends, competitor_crawl
-    status = Column(String(20), default="pending")  # pending, running, completed, failed
+    status = Column(String(20), default="pending")  # pending, running, completed, failed, cancelled
     seed_keyword = Column(String(500), nullable=True)
     target = Column(String(500), nullable=True)  # competitor domain or keyword
     keywords_found = Column(Integer, default=0)
     progress = Column(Float, default=0.0)  # 0-100
     error_message = Column(Text, nullable=True)
+    params = Column(Text, nullable=True)  # JSON: handler arguments for the job queue
+    attempts = Column(Integer, default=0)  # times claimed by a queue worker
+    claimed_by = Column(String(100), nullable=True)  # worker id (host:pid:boot) running the job
+    heartbeat_at = Column(DateTime, nullable=True)  # last liveness ping from claimed_by
+    cancel_requested = Column(Boolean, default=False)  # checked at the job's cooperative checkpoints
+    priority = Column(Integer, default=1)  # rate_limiter.Priority: 0 interactive, 1 scheduled, 2 backfill
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CollectionJob(CollectionJobColumns, Base):
+    __tablename__ = "collection_jobs"
+    __table_args__ = (
+        # Job history pages and queue claims filter on these, newest first
+        Index("ix_collection_jobs_created", "created_at"),
+        Index("ix_collection_jobs_status_created", "status", "created_at"),
+        Index("ix_collection_jobs_type_created", "job_type", "created_at"),
+        Index("ix_collection_jobs_status_priority", "status", "priority", "id"),
+        Index("ix_collection_jobs_status_completed", "status", "completed_at"),
+        # NOCASE so the (case-insensitive) seed prefix LIKE can use it
+        Index("ix_collection_jobs_seed", text("seed_keyword COLLATE NOCASE")),
+    )
+
+
+class CollectionJobArchive(CollectionJobColumns, Base):
+    """Finished jobs moved out of collection_jobs by the retention task."""
+    __tablename__ = "collection_jobs_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # keeps the original job id
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -19,15 +19,18 @@ class Keyword(Base):
     monthly_searches = Column(Text, nullable=True)       # JSON: [{year,month,search_volume}]
     competition = Column(Float, nullable=True)           # 0-1 competition score (legacy)
     is_rising = Column(Boolean, default=False)
+    rise_percentage = Column(Float, nullable=True)  # recent vs baseline interest, from the rising detector
     language = Column(String(10), default="en")
     parent_keyword = Column(String(500), nullable=True)
     expansion_depth = Column(Integer, default=0)
     first_seen = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    trends_refreshed_at = Column(DateTime, nullable=True)  # last Google Trends score refresh
     source_count = Column(Integer, default=1)  # how many sources found this keyword
 
     categories = relationship("KeywordCategoryMap", back_populates="keyword", cascade="all, delete-orphan")
     trend_snapshots = relationship("TrendSnapshot", back_populates="keyword", cascade="all, delete-orphan")
+    trend_series = relationship("TrendSeries", back_populates="keyword", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Keyword '{self.keyword}' heat={self.heat_score}>"
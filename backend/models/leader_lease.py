@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from backend.database import Base
+
+
+class LeaderLease(Base):
+    __tablename__ = "leader_leases"
+
+    name = Column(String(50), primary_key=True)  # e.g. "scheduler"
+    holder = Column(String(100), nullable=False)  # host:pid:boot of the current leader
+    acquired_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False)  # leader must renew before this
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Float
+from backend.database import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket state shared by every process using the same database."""
+    __tablename__ = "rate_limit_buckets"
+
+    name = Column(String(50), primary_key=True)  # e.g. "autocomplete"
+    tokens = Column(Float, nullable=False)  # negative while callers hold reservations
+    rate = Column(Float, nullable=False)  # tokens per second, lowered while the upstream throttles us
+    target_rate = Column(Float, nullable=True)  # configured tokens per second
+    capacity = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix time of the last refill
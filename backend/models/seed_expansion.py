@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from backend.database import Base
+
+
+class SeedExpansion(Base):
+    """Last successful expansion per normalized seed, per source."""
+    __tablename__ = "seed_expansions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    seed = Column(String(500), unique=True, nullable=False, index=True)  # clean_keyword(seed)
+    autocomplete_depth = Column(Integer, nullable=True)  # depth of the last autocomplete run
+    autocomplete_at = Column(DateTime, nullable=True)
+    trends_at = Column(DateTime, nullable=True)
+    serp_at = Column(DateTime, nullable=True)
+    # Job whose results stand for each source; a partial rerun only moves its own
+    autocomplete_job_id = Column(Integer, nullable=True)
+    trends_job_id = Column(Integer, nullable=True)
+    serp_job_id = Column(Integer, nullable=True)
+    last_job_id = Column(Integer, nullable=True)  # last run of any source
+    keywords_found = Column(Integer, default=0)  # new keywords from the last run
+    last_expanded_at = Column(DateTime, default=datetime.utcnow)
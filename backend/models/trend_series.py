@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from backend.database import Base
+
+
+class TrendSeries(Base):
+    """One fetched interest-over-time series for a keyword, packed as little-endian float32."""
+    __tablename__ = "trend_series"
+    __table_args__ = (Index("ix_trend_series_keyword_fetched", "keyword_id", "fetched_at"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False)
+    timeframe = Column(String(50), nullable=False)
+    geo = Column(String(10), default="")
+    anchor = Column(String(500), nullable=True)  # values are in units of this keyword's mean; None = raw 0-100
+    start = Column(DateTime, nullable=False)  # date of the first point
+    step_seconds = Column(Integer, nullable=False)  # spacing between points
+    points = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)  # float32 x points
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    keyword = relationship("Keyword", back_populates="trend_series")
@@ -1,17 +1,19 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Boolean, String, Index
 from sqlalchemy.orm import relationship
 from backend.database import Base
 
 
 class TrendSnapshot(Base):
     __tablename__ = "trend_snapshots"
+    __table_args__ = (Index("ix_trend_snapshots_keyword_date", "keyword_id", "snapshot_date"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False)
     trends_score = Column(Float, default=0.0)
     is_rising = Column(Boolean, default=False)
     rise_percentage = Column(Float, nullable=True)  # e.g. 500 = 500% increase
-    snapshot_date = Column(DateTime, default=datetime.utcnow)
+    snapshot_date = Column(DateTime, default=datetime.utcnow)  # bucket start for aggregated rows
+    resolution = Column(String(10), default="raw")  # raw, week, month (averaged by compaction)
 
     keyword = relationship("Keyword", back_populates="trend_snapshots")
@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from backend.database import Base
+
+
+class TrendsCacheEntry(Base):
+    """One fetch_trends result, keyed by its (sorted keywords, timeframe, geo)."""
+    __tablename__ = "trends_cache"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(40), unique=True, nullable=False, index=True)  # sha1 of the key
+    keywords = Column(Text, nullable=False)  # JSON list, sorted
+    timeframe = Column(String(50), nullable=False)
+    geo = Column(String(10), default="")
+    result = Column(Text, nullable=False)  # JSON: interest_over_time, related_queries, rising
+    hits = Column(Integer, default=0)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class TrendsAnchorSeries(Base):
+    """A keyword's interest series in units of the anchor keyword it was fetched with."""
+    __tablename__ = "trends_anchor_series"
+    __table_args__ = (UniqueConstraint("keyword", "anchor", "timeframe", "geo"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    keyword = Column(String(500), nullable=False, index=True)
+    anchor = Column(String(500), nullable=False)
+    timeframe = Column(String(50), nullable=False)
+    geo = Column(String(10), default="")
+    series = Column(Text, nullable=False)  # JSON list: interest values divided by the anchor mean
+    related = Column(Text, nullable=True)  # JSON list of top related queries
+    rising = Column(Text, nullable=True)  # JSON list of rising items with this keyword as parent
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,7 +1,6 @@
 """
-Admin endpoints for managing categories and reseed operations.
+Admin endpoints for managing categories, reseed operations and upstream rate limits.
 """
-import asyncio
 import json
 from datetime import datetime
 from fastapi import APIRouter, Depends
@@ -11,13 +10,14 @@ from sqlalchemy import select, delete
 from backend.database import get_db
 from backend.models.template_category import TemplateCategory
 from backend.models.keyword import Keyword, KeywordCategoryMap
-from backend.models.collection_job import CollectionJob
 from backend.services.keyword_classifier import classify_all_keywords, classify_keyword
 from backend.services.heat_ranker import calculate_heat_score
-from backend.services.keyword_expander import run_expansion
 from backend.utils.seed_data import TEMPLATE_CATEGORIES
-from backend.config import SEED_KEYWORDS
+from backend.config import SEED_KEYWORDS, settings
 from backend.services.dataforseo_service import get_search_volume, get_account_balance
+from backend.tasks.job_queue import enqueue_many
+from backend.utils.rate_limiter import Priority, LIMITERS, rate_limit_backend
+from backend.utils.upstream_health import HEALTH
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -125,36 +125,18 @@ async def populate_seeds(
 
     await db.commit()
 
-    # Optionally start expansion jobs for all seeds in background
+    # Optionally queue expansion jobs for all seeds; the worker pool bounds concurrency
     jobs_started = 0
     if expand:
-        for kw_text in SEED_KEYWORDS:
-            job = CollectionJob(
-                job_type="expansion",
-                status="pending",
-                seed_keyword=kw_text,
-                created_at=datetime.utcnow(),
-            )
-            db.add(job)
-            await db.commit()
-            await db.refresh(job)
-
-            captured_id = job.id
-
-            async def _run(jid=captured_id, seed=kw_text):
-                from backend.database import async_session
-                async with async_session() as session:
-                    await run_expansion(
-                        session, seed,
-                        depth=1,
-                        use_autocomplete=True,
-                        use_trends=False,
-                        use_serp=False,
-                        existing_job_id=jid,
-                    )
-
-            asyncio.create_task(_run())
-            jobs_started += 1
+        job_ids = await enqueue_many(
+            db, "expansion", SEED_KEYWORDS,
+            priority=Priority.BACKFILL,
+            depth=1,
+            use_autocomplete=True,
+            use_trends=False,
+            use_serp=False,
+        )
+        jobs_started = len(job_ids)
 
     return {
         "inserted": inserted,
@@ -265,3 +247,64 @@ async def list_categories_admin(db: AsyncSession = Depends(get_db)):
             "keyword_count": len(kw_count),
         })
     return result
+
+
+# With per-process buckets and jobs in a separate worker, this process's limiters
+# aren't the ones doing the work; changing or reading them here would mislead.
+SPLIT_MEMORY_WARNING = (
+    "Rate limits are per process (rate_limit_backend=memory) and jobs run in a separate "
+    "worker, so these are the web process's limiters. Set RATE_LIMIT_BACKEND=sqlite on "
+    "every process to see and change the limits the worker uses."
+)
+
+
+def _split_memory_limiters() -> bool:
+    return rate_limit_backend() == "memory" and not settings.run_background_jobs
+
+
+async def _limiter_status(name: str) -> dict:
+    return {**await LIMITERS[name].live_stats(), "health": HEALTH[name].status()}
+
+
+@router.get("/rate-limits")
+async def rate_limits():
+    """
+    Upstream limiters: token levels, queue depth and wait times per priority
+    class, plus breaker state. With the sqlite backend, rate and token levels
+    come from the shared bucket; queues and waits are always this process's.
+    """
+    result = {
+        "backend": rate_limit_backend(),
+        "limiters": {name: await _limiter_status(name) for name in LIMITERS},
+    }
+    if _split_memory_limiters():
+        result["warning"] = SPLIT_MEMORY_WARNING
+    return result
+
+
+@router.put("/rate-limits/{name}")
+async def update_rate_limit(
+    name: str,
+    requests_per_minute: float | None = None,
+    burst: int | None = None,
+):
+    """
+    Change an upstream's rate and/or burst capacity without a restart.
+    Queued callers are re-timed at once. Changes last until the process
+    restarts; set the *_requests_per_minute / *_burst settings to keep them.
+    """
+    limiter = LIMITERS.get(name)
+    if limiter is None:
+        return {"error": f"Unknown limiter '{name}'", "limiters": list(LIMITERS)}
+    if _split_memory_limiters():
+        return {"error": SPLIT_MEMORY_WARNING}
+    if requests_per_minute is None and burst is None:
+        return {"error": "Provide requests_per_minute and/or burst"}
+    if (requests_per_minute is not None and requests_per_minute <= 0) or (burst is not None and burst < 1):
+        return {"error": "requests_per_minute must be > 0 and burst >= 1"}
+
+    await limiter.reconfigure(
+        rate=requests_per_minute / 60 if requests_per_minute is not None else None,
+        capacity=burst,
+    )
+    return await _limiter_status(name)
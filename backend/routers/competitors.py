@@ -1,4 +1,3 @@
-import asyncio
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -7,7 +6,9 @@ from backend.database import get_db
 from backend.models.competitor import Competitor
 from backend.models.competitor_keyword import CompetitorKeyword
 from backend.schemas.keyword import CompetitorCreate, CompetitorOut
-from backend.services.competitor_analyzer import analyze_competitor, get_keyword_gap
+from backend.services.competitor_analyzer import get_keyword_gap
+from backend.tasks.job_queue import enqueue
+from backend.utils.rate_limiter import Priority
 
 router = APIRouter(prefix="/api/competitors", tags=["competitors"])
 
@@ -48,13 +49,13 @@ async def start_analysis(
     if not competitor:
         return {"error": "Competitor not found"}
 
-    async def _run():
-        from backend.database import async_session
-        async with async_session() as session:
-            await analyze_competitor(session, competitor_id)
-
-    asyncio.create_task(_run())
-    return {"status": "started", "competitor": competitor.domain}
+    job = await enqueue(
+        db, "competitor_crawl",
+        target=competitor.domain,
+        priority=Priority.INTERACTIVE,
+        competitor_id=competitor_id,
+    )
+    return {"status": "queued", "job_id": job.id, "competitor": competitor.domain}
 
 
 @router.get("/{competitor_id}/keywords")
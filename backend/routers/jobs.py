@@ -1,34 +1,175 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, update, desc, func, tuple_
 
-from backend.database import get_db
+from backend.config import settings
+from backend.database import get_db, async_session
 from backend.models.collection_job import CollectionJob
+from backend.tasks.events import job_events, publish_job, reuse_fields, FINISHED_STATUSES
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
+# Jobs run in another process when run_background_jobs is off, so no in-process
+# events arrive; re-read them from the DB more often in that case.
+STREAM_KEEPALIVE_SECONDS = 15 if settings.run_background_jobs else 2
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def _serialize_job(j: CollectionJob) -> dict:
+    return {
+        "id": j.id, "job_type": j.job_type, "status": j.status, "priority": j.priority,
+        "seed_keyword": j.seed_keyword, "target": j.target,
+        "keywords_found": j.keywords_found, "progress": j.progress,
+        "error_message": j.error_message,
+        **reuse_fields(j),
+        "started_at": j.started_at.isoformat() if j.started_at else None,
+        "completed_at": j.completed_at.isoformat() if j.completed_at else None,
+        "created_at": j.created_at.isoformat() if j.created_at else None,
+    }
+
+
+def _sse(event: dict, name: str = "job") -> str:
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _load_jobs(job_ids) -> list[CollectionJob]:
+    async with async_session() as db:
+        result = await db.execute(select(CollectionJob).where(CollectionJob.id.in_(job_ids)))
+        return result.scalars().all()
+
+
+def _encode_cursor(job: CollectionJob) -> str:
+    return f"{job.created_at.isoformat()}|{job.id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    created_at, job_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(job_id)
+
 
 @router.get("")
 async def list_jobs(
-    limit: int = 50,
+    status: str | None = None,
+    job_type: str | None = None,
+    seed: str | None = None,
+    limit: int = Query(50, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(CollectionJob).order_by(desc(CollectionJob.created_at)).limit(limit)
+    """
+    Job history, newest first. Keyset pagination on (created_at, id) so deep
+    pages cost the same as the first; filters ride the status/type indexes,
+    and `seed` matches seeds starting with it (case-insensitive) via the seed index.
+    """
+    query = select(CollectionJob)
+    if status:
+        query = query.where(CollectionJob.status == status)
+    if job_type:
+        query = query.where(CollectionJob.job_type == job_type)
+    if seed:
+        # Prefix match only: a leading wildcard can't use the seed index
+        prefix = seed.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(CollectionJob.seed_keyword.like(f"{prefix}%", escape="\\"))
+    if cursor:
+        try:
+            created_at, job_id = _decode_cursor(cursor)
+        except ValueError:
+            return {"error": "Invalid cursor"}
+        query = query.where(tuple_(CollectionJob.created_at, CollectionJob.id) < (created_at, job_id))
+
+    query = query.order_by(desc(CollectionJob.created_at), desc(CollectionJob.id)).limit(limit + 1)
+    jobs = (await db.execute(query)).scalars().all()
+    has_more = len(jobs) > limit
+    jobs = jobs[:limit]
+    return {
+        "items": [_serialize_job(j) for j in jobs],
+        "next_cursor": _encode_cursor(jobs[-1]) if has_more else None,
+    }
+
+
+def _count_by_type_and_status(*conditions):
+    return (
+        select(CollectionJob.job_type, CollectionJob.status, func.count())
+        .where(*conditions)
+        .group_by(CollectionJob.job_type, CollectionJob.status)
+    )
+
+
+@router.get("/stats")
+async def job_stats(
+    hours: int = Query(24, description="Window for finished-job counts"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Job counts per type and status: all pending/running jobs, plus jobs finished in the window."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    active = await db.execute(_count_by_type_and_status(CollectionJob.status.in_(ACTIVE_STATUSES)))
+    finished = await db.execute(_count_by_type_and_status(
+        # By when they finished: a job queued before the window can finish inside it
+        CollectionJob.status.in_(FINISHED_STATUSES), CollectionJob.completed_at >= since,
+    ))
+
+    by_type: dict[str, dict[str, int]] = {}
+    totals: dict[str, int] = {}
+    for job_type, status, n in [*active.all(), *finished.all()]:
+        by_type.setdefault(job_type, {})[status] = n
+        totals[status] = totals.get(status, 0) + n
+    return {"since": since.isoformat(), "totals": totals, "by_type": by_type}
+
+
+@router.get("/stream")
+async def stream_jobs(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated job ids"),
+):
+    """
+    Server-sent events for a set of jobs.
+    Sends the current state of each job, then pushes progress/status changes
+    until every job has finished. A keepalive tick re-reads unfinished jobs
+    from the DB (one query) in case an update was missed or the jobs run in a
+    separate worker process.
+    """
+    job_ids = [int(x) for x in ids.split(",") if x.strip().isdigit()][:100]
+
+    async def event_stream():
+        # Subscribe before the snapshot read so no update falls in between
+        queue = job_events.subscribe(job_ids)
+        try:
+            pending = set()
+            for job in await _load_jobs(job_ids):
+                yield _sse(_serialize_job(job))
+                if job.status not in FINISHED_STATUSES:
+                    pending.add(job.id)
+
+            while pending:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                    events = [event]
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    events = [_serialize_job(j) for j in await _load_jobs(pending)]
+                    yield ": keepalive\n\n"
+                for event in events:
+                    if event["id"] not in pending:
+                        continue
+                    yield _sse(event)
+                    if event.get("status") in FINISHED_STATUSES:
+                        pending.discard(event["id"])
+
+            yield _sse({}, name="done")
+        finally:
+            job_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    jobs = result.scalars().all()
-    return [
-        {
-            "id": j.id, "job_type": j.job_type, "status": j.status,
-            "seed_keyword": j.seed_keyword, "target": j.target,
-            "keywords_found": j.keywords_found, "progress": j.progress,
-            "error_message": j.error_message,
-            "started_at": j.started_at.isoformat() if j.started_at else None,
-            "completed_at": j.completed_at.isoformat() if j.completed_at else None,
-            "created_at": j.created_at.isoformat() if j.created_at else None,
-        }
-        for j in jobs
-    ]
 
 
 @router.get("/{job_id}")
@@ -36,12 +177,32 @@ async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
     job = await db.get(CollectionJob, job_id)
     if not job:
         return {"error": "Job not found"}
-    return {
-        "id": job.id, "job_type": job.job_type, "status": job.status,
-        "seed_keyword": job.seed_keyword, "target": job.target,
-        "keywords_found": job.keywords_found, "progress": job.progress,
-        "error_message": job.error_message,
-        "started_at": job.started_at.isoformat() if job.started_at else None,
-        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
-        "created_at": job.created_at.isoformat() if job.created_at else None,
-    }
+    return _serialize_job(job)
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Cancel a job. Pending jobs are cancelled immediately; running jobs are
+    flagged and stop at their next checkpoint, keeping partial results.
+    """
+    job = await db.get(CollectionJob, job_id)
+    if not job:
+        return {"error": "Job not found"}
+    if job.status in FINISHED_STATUSES:
+        return {"id": job.id, "status": job.status}
+
+    # Conditional update: a worker may claim the job between our read and write
+    result = await db.execute(
+        update(CollectionJob)
+        .where(CollectionJob.id == job_id, CollectionJob.status == "pending")
+        .values(status="cancelled", error_message="Cancelled by user", completed_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        await db.execute(
+            update(CollectionJob).where(CollectionJob.id == job_id).values(cancel_requested=True)
+        )
+    await db.commit()
+    await db.refresh(job)
+    publish_job(job)
+    return {"id": job.id, "status": job.status, "cancel_requested": bool(job.cancel_requested)}
@@ -1,7 +1,5 @@
-import asyncio
 import csv
 import io
-from datetime import datetime
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,12 +8,13 @@ from sqlalchemy import select, func, desc
 from backend.database import get_db
 from backend.models.keyword import Keyword, KeywordCategoryMap
 from backend.models.template_category import TemplateCategory
-from backend.models.collection_job import CollectionJob
-from backend.services.keyword_expander import run_expansion
 from backend.services.keyword_classifier import classify_all_keywords
 from backend.schemas.keyword import (
     KeywordOut, KeywordExpansionRequest, KeywordExpansionResult, KeywordListResponse
 )
+from backend.tasks.job_queue import enqueue
+from backend.utils.rate_limiter import Priority
+from backend.utils.text_processing import clean_keyword
 
 router = APIRouter(prefix="/api/keywords", tags=["keywords"])
 
@@ -42,7 +41,8 @@ async def list_keywords(
     if rising_only:
         query = query.where(Keyword.is_rising == True)
     if parent_keyword:
-        query = query.where(Keyword.parent_keyword == parent_keyword)
+        # Expansion stores children under the normalized seed
+        query = query.where(Keyword.parent_keyword.in_({parent_keyword, clean_keyword(parent_keyword)}))
     if category:
         query = query.join(KeywordCategoryMap).join(TemplateCategory).where(
             TemplateCategory.name == category
@@ -94,37 +94,22 @@ async def expand_keywords(
     req: KeywordExpansionRequest,
     db: AsyncSession = Depends(get_db),
 ):
-    """Start a keyword expansion job in the background."""
-    job = CollectionJob(
-        job_type="expansion",
-        status="pending",
+    """Queue a keyword expansion job for the background worker pool."""
+    job = await enqueue(
+        db, "expansion",
         seed_keyword=req.seed_keyword,
-        created_at=datetime.utcnow(),
+        priority=Priority.INTERACTIVE,
+        depth=req.depth,
+        use_autocomplete=req.use_autocomplete,
+        use_trends=req.use_trends,
+        use_serp=req.use_serp,
+        force=req.force,
     )
-    db.add(job)
-    await db.commit()
-    await db.refresh(job)
-
-    captured_job_id = job.id
-
-    async def _run():
-        from backend.database import async_session
-        async with async_session() as session:
-            await run_expansion(
-                session, req.seed_keyword,
-                depth=req.depth,
-                use_autocomplete=req.use_autocomplete,
-                use_trends=req.use_trends,
-                use_serp=req.use_serp,
-                existing_job_id=captured_job_id,
-            )
-
-    asyncio.create_task(_run())
 
     return KeywordExpansionResult(
         job_id=job.id,
         seed_keyword=req.seed_keyword,
-        status="started",
+        status="queued",
     )
 
 
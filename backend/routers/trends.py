@@ -1,16 +1,22 @@
-import asyncio
+import json
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 
+from backend.config import settings
 from backend.database import get_db
 from backend.models.keyword import Keyword
-from backend.models.collection_job import CollectionJob
-from backend.models.trend_snapshot import TrendSnapshot
-from backend.services.google_trends import fetch_trends_batched
-from backend.services.trending_discovery import fetch_all_trending
-from backend.services.keyword_expander import run_expansion
+from backend.services.google_trends import fetch_trends_batched, trends_sessions
+from backend.services.trending_discovery import trending_cache
+from backend.services.trends_cache import cache_stats
+from backend.services.trend_series import store_series, load_series
+from backend.services.rising_detector import detect_rising
+from backend.services.snapshot_history import snapshot_history, add_snapshots
+from backend.services.keyword_lookup import resolve_keywords
+from backend.tasks.job_queue import enqueue_many
+from backend.utils.rate_limiter import Priority
 
 router = APIRouter(prefix="/api/trends", tags=["trends"])
 
@@ -32,28 +38,44 @@ async def get_rising_keywords(
         {
             "id": kw.id, "keyword": kw.keyword,
             "heat_score": kw.heat_score, "trends_score": kw.trends_score,
+            "rise_percentage": kw.rise_percentage,
         }
         for kw in keywords
     ]
 
 
 @router.get("/snapshots/{keyword_id}")
-async def get_trend_snapshots(keyword_id: int, db: AsyncSession = Depends(get_db)):
-    """Get trend history for a keyword."""
-    result = await db.execute(
-        select(TrendSnapshot)
-        .where(TrendSnapshot.keyword_id == keyword_id)
-        .order_by(TrendSnapshot.snapshot_date)
-    )
-    snapshots = result.scalars().all()
-    return [
-        {
-            "date": s.snapshot_date.isoformat(),
-            "score": s.trends_score,
-            "is_rising": s.is_rising,
-        }
-        for s in snapshots
-    ]
+async def get_trend_snapshots(
+    keyword_id: int,
+    since: datetime | None = None,
+    resolution: str = Query("raw", pattern="^(raw|week|month)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get trend history for a keyword, optionally from a date and averaged per week/month."""
+    return await snapshot_history(db, keyword_id, since=since, resolution=resolution)
+
+
+@router.get("/series")
+async def get_trend_series_bulk(
+    ids: str = Query(..., description="Comma-separated keyword ids"),
+    since: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Full interest-over-time history for many keywords at once, for charting."""
+    keyword_ids = [int(x) for x in ids.split(",") if x.strip().isdigit()][:200]
+    history = await load_series(db, keyword_ids, since=since)
+    return {str(keyword_id): series for keyword_id, series in history.items()}
+
+
+@router.get("/series/{keyword_id}")
+async def get_trend_series(
+    keyword_id: int,
+    since: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Full interest-over-time history for one keyword."""
+    history = await load_series(db, [keyword_id], since=since)
+    return history.get(keyword_id, {"anchor": None, "dates": [], "values": []})
 
 
 @router.post("/refresh")
@@ -73,33 +95,77 @@ async def refresh_trends(
     if not keywords:
         return {"error": "No keywords to refresh"}
 
-    data = await fetch_trends_batched(keywords)
-    updated = 0
-    for kw_text in keywords:
-        score_key = f"{kw_text}_score"
-        if score_key in data.get("interest_over_time", {}):
-            result = await db.execute(select(Keyword).where(Keyword.keyword == kw_text))
-            kw = result.scalar_one_or_none()
-            if kw:
-                kw.trends_score = data["interest_over_time"][score_key]
-                # Save snapshot
-                snapshot = TrendSnapshot(
-                    keyword_id=kw.id,
-                    trends_score=kw.trends_score,
-                    is_rising=kw.is_rising,
-                )
-                db.add(snapshot)
-                updated += 1
-
+    data = await fetch_trends_batched(keywords, anchor=settings.trends_anchor_keyword or None)
+    scores = data.get("interest_over_time", {})
+    found = await resolve_keywords(db, keywords)
+    refreshed_at = datetime.utcnow()
+    keyword_ids = {}
+    snapshots = []
+    for kw_text, kw in found.items():
+        score = scores.get(f"{kw_text}_score")
+        if score is None:
+            continue
+        keyword_ids[kw_text] = kw.id
+        kw.trends_score = score
+        kw.trends_refreshed_at = refreshed_at
+        snapshots.append({"keyword_id": kw.id, "trends_score": score, "is_rising": kw.is_rising})
+    updated = len(snapshots)
+
+    await add_snapshots(db, snapshots)
+    await store_series(db, keyword_ids, data)
     await db.commit()
     return {"updated": updated, "rising_found": len(data.get("rising", []))}
 
 
+@router.post("/detect-rising")
+async def run_rising_detection(db: AsyncSession = Depends(get_db)):
+    """Recompute is_rising and rise_percentage from stored series for all keywords."""
+    return await detect_rising(db)
+
+
+@router.get("/sessions")
+async def get_trends_sessions():
+    """Google Trends worker pool counters (requests, errors, session rotations)."""
+    return trends_sessions.stats()
+
+
+@router.get("/cache-stats")
+async def get_trends_cache_stats():
+    """Trends cache hit rates and stored entries, for tuning the cache TTLs."""
+    return await cache_stats()
+
+
 @router.get("/trending-now")
 async def get_trending_now():
-    """Fetch real-time trending topics from Google, Reddit, and Twitter."""
-    data = await fetch_all_trending()
-    return data
+    """
+    Trending topics from Google, Reddit, and Twitter, served from the
+    in-memory cache; stale sources are refreshed in the background.
+    """
+    return await trending_cache.get_all()
+
+
+@router.get("/trending-now/stream")
+async def stream_trending_now():
+    """
+    Newline-delimited JSON: one line per source as soon as it is ready
+    ({"source", "items", "status", "error"}), then {"done": true}. Each source
+    has its own deadline, so one slow upstream doesn't hold back the others.
+    """
+    async def lines():
+        async for name, items, error in trending_cache.stream():
+            yield json.dumps({
+                "source": name,
+                "items": items,
+                "status": trending_cache.source_status(name),
+                "error": error,
+            }) + "\n"
+        yield json.dumps({"done": True}) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/expand-trending")
@@ -111,33 +177,15 @@ async def expand_trending_topics(
     if not terms:
         return {"error": "No terms provided"}
 
-    jobs = []
-    for term in terms[:10]:  # cap at 10 concurrent expansions
-        job = CollectionJob(
-            job_type="expansion",
-            status="pending",
-            seed_keyword=term,
-            created_at=datetime.utcnow(),
-        )
-        db.add(job)
-        await db.commit()
-        await db.refresh(job)
-
-        captured_id = job.id
-
-        async def _run(jid=captured_id, kw=term):
-            from backend.database import async_session
-            async with async_session() as session:
-                await run_expansion(
-                    session, kw,
-                    depth=1,
-                    use_autocomplete=True,
-                    use_trends=True,
-                    use_serp=False,   # skip SERP to keep it fast for bulk runs
-                    existing_job_id=jid,
-                )
-
-        asyncio.create_task(_run())
-        jobs.append({"job_id": job.id, "term": term})
+    terms = terms[:10]  # cap at 10 expansions per request
+    job_ids = await enqueue_many(
+        db, "expansion", terms,
+        priority=Priority.INTERACTIVE,
+        depth=1,
+        use_autocomplete=True,
+        use_trends=True,
+        use_serp=False,   # skip SERP to keep it fast for bulk runs
+    )
+    jobs = [{"job_id": job_id, "term": term} for job_id, term in zip(job_ids, terms)]
 
     return {"started": len(jobs), "jobs": jobs}
@@ -47,6 +47,7 @@ class KeywordExpansionRequest(BaseModel):
     use_autocomplete: bool = True
     use_trends: bool = True
     use_serp: bool = True
+    force: bool = False  # re-query upstream even if the seed was expanded recently
 
 
 class KeywordExpansionResult(BaseModel):
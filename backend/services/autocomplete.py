@@ -3,7 +3,9 @@ import json
 import string
 import asyncio
 import logging
+from typing import Awaitable, Callable
 from backend.utils.rate_limiter import autocomplete_limiter
+from backend.utils.upstream_health import autocomplete_health, throttle_signal
 from backend.utils.text_processing import clean_keyword, deduplicate_keywords
 
 logger = logging.getLogger(__name__)
@@ -11,8 +13,8 @@ logger = logging.getLogger(__name__)
 AUTOCOMPLETE_URL = "https://suggestqueries.google.com/complete/search"
 
 
-async def fetch_autocomplete(query: str, lang: str = "en") -> list[str]:
-    """Fetch Google Autocomplete suggestions for a query."""
+async def fetch_autocomplete(query: str, lang: str = "en", errors: list[str] | None = None) -> list[str]:
+    """Fetch Google Autocomplete suggestions for a query; failed calls are noted in `errors`."""
     await autocomplete_limiter.acquire()
     params = {
         "client": "firefox",
@@ -22,23 +24,36 @@ async def fetch_autocomplete(query: str, lang: str = "en") -> list[str]:
     try:
         async with httpx.AsyncClient(timeout=10) as client:
             resp = await client.get(AUTOCOMPLETE_URL, params=params)
+            throttled = throttle_signal(resp)
+            if throttled:
+                logger.warning(f"Autocomplete throttled for '{query}': {throttled}")
+                await autocomplete_health.record("throttled", throttled)
+                if errors is not None:
+                    errors.append(f"'{query}': {throttled}")
+                return []
             resp.raise_for_status()
             data = resp.json()
+            suggestions = []
             if isinstance(data, list) and len(data) > 1:
-                return [clean_keyword(s) for s in data[1] if isinstance(s, str)]
+                suggestions = [clean_keyword(s) for s in data[1] if isinstance(s, str)]
+            await autocomplete_health.record("ok" if suggestions else "empty")
+            return suggestions
     except Exception as e:
         logger.warning(f"Autocomplete failed for '{query}': {e}")
+        await autocomplete_health.record("error")
+        if errors is not None:
+            errors.append(f"'{query}': {e}")
     return []
 
 
-async def expand_with_alphabet(seed: str, lang: str = "en") -> list[str]:
+async def expand_with_alphabet(seed: str, lang: str = "en", errors: list[str] | None = None) -> list[str]:
     """Expand a seed keyword with alphabet suffixes (seed + a/b/c/.../z)."""
     tasks = []
     # Base query
-    tasks.append(fetch_autocomplete(seed, lang))
+    tasks.append(fetch_autocomplete(seed, lang, errors))
     # Alphabet expansion
     for letter in string.ascii_lowercase:
-        tasks.append(fetch_autocomplete(f"{seed} {letter}", lang))
+        tasks.append(fetch_autocomplete(f"{seed} {letter}", lang, errors))
 
     results = await asyncio.gather(*tasks, return_exceptions=True)
     all_keywords = []
@@ -48,19 +63,29 @@ async def expand_with_alphabet(seed: str, lang: str = "en") -> list[str]:
     return deduplicate_keywords(all_keywords)
 
 
-async def expand_keyword(seed: str, depth: int = 1, lang: str = "en") -> list[str]:
+async def expand_keyword(
+    seed: str,
+    depth: int = 1,
+    lang: str = "en",
+    should_stop: Callable[[], Awaitable[str | None]] | None = None,
+    errors: list[str] | None = None,
+) -> list[str]:
     """Recursively expand a seed keyword.
 
     depth=1: just alphabet expansion
     depth=2: take top 5 results and expand again
+    should_stop: job checkpoint, polled between depth-2 sub-seeds
+    errors: if given, collects a note for every throttled or failed call
     """
-    all_keywords = await expand_with_alphabet(seed, lang)
+    all_keywords = await expand_with_alphabet(seed, lang, errors)
     logger.info(f"Depth 1: Found {len(all_keywords)} keywords for '{seed}'")
 
     if depth >= 2 and all_keywords:
         top_seeds = all_keywords[:5]
         for sub_seed in top_seeds:
-            sub_results = await expand_with_alphabet(sub_seed, lang)
+            if should_stop and await should_stop():
+                break
+            sub_results = await expand_with_alphabet(sub_seed, lang, errors)
             all_keywords.extend(sub_results)
         all_keywords = deduplicate_keywords(all_keywords)
         logger.info(f"Depth 2: Total {len(all_keywords)} keywords for '{seed}'")
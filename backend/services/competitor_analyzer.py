@@ -10,7 +10,11 @@ from backend.models.competitor import Competitor, CompetitorPage
 from backend.models.competitor_keyword import CompetitorKeyword
 from backend.models.keyword import Keyword
 from backend.models.collection_job import CollectionJob
+from backend.config import settings
+from backend.tasks.events import publish_job
+from backend.tasks.progress import ProgressReporter
 from backend.utils.rate_limiter import competitor_limiter
+from backend.utils.upstream_health import competitor_health, throttle_signal
 from backend.utils.text_processing import extract_ngrams, filter_stopwords, deduplicate_keywords
 
 logger = logging.getLogger(__name__)
@@ -21,6 +25,16 @@ HEADERS = {
 }
 
 
+async def _record_response(resp: httpx.Response):
+    """Report a competitor site response to the competitor limiter's health tracker."""
+    throttled = throttle_signal(resp, captcha=False)
+    if throttled:
+        logger.warning(f"Competitor site throttled us at {resp.url}: {throttled}")
+        await competitor_health.record("throttled", throttled)
+    else:
+        await competitor_health.record("ok" if resp.status_code == 200 else "error")
+
+
 async def fetch_sitemap_urls(sitemap_url: str, max_urls: int = 100) -> list[str]:
     """Parse a sitemap.xml and return page URLs."""
     await competitor_limiter.acquire()
@@ -28,6 +42,7 @@ async def fetch_sitemap_urls(sitemap_url: str, max_urls: int = 100) -> list[str]
     try:
         async with httpx.AsyncClient(timeout=20, follow_redirects=True) as client:
             resp = await client.get(sitemap_url, headers=HEADERS)
+            await _record_response(resp)
             if resp.status_code != 200:
                 logger.warning(f"Sitemap fetch failed: {sitemap_url} -> {resp.status_code}")
                 return urls
@@ -59,6 +74,7 @@ async def crawl_page(url: str) -> dict | None:
     try:
         async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
             resp = await client.get(url, headers=HEADERS)
+            await _record_response(resp)
             if resp.status_code != 200:
                 return None
             soup = BeautifulSoup(resp.text, "lxml")
@@ -88,28 +104,47 @@ async def crawl_page(url: str) -> dict | None:
         return None
 
 
-async def analyze_competitor(db: AsyncSession, competitor_id: int) -> CollectionJob:
-    """Full competitor analysis pipeline."""
+async def analyze_competitor(
+    db: AsyncSession,
+    competitor_id: int,
+    existing_job_id: int | None = None,
+) -> CollectionJob:
+    """Full competitor analysis pipeline.
+
+    The crawl loop checks for cancellation or the job's wall-clock timeout
+    after every page; when either hits, the pages crawled so far are still
+    saved and their keywords merged into the competitor's existing set.
+    """
     competitor = await db.get(Competitor, competitor_id)
     if not competitor:
         raise ValueError(f"Competitor {competitor_id} not found")
 
-    job = CollectionJob(
-        job_type="competitor_crawl",
-        status="running",
-        target=competitor.domain,
-        started_at=datetime.utcnow(),
-    )
-    db.add(job)
-    await db.commit()
-    await db.refresh(job)
+    # Reuse an existing job record (created by the job queue) or create a new one
+    if existing_job_id is not None:
+        job = await db.get(CollectionJob, existing_job_id)
+        if job is None:
+            raise ValueError(f"Job {existing_job_id} not found")
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        await db.commit()
+    else:
+        job = CollectionJob(
+            job_type="competitor_crawl",
+            status="running",
+            target=competitor.domain,
+            started_at=datetime.utcnow(),
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+    publish_job(job)
 
+    progress = ProgressReporter(job.id, timeout=settings.job_timeouts.get("competitor_crawl"))
     try:
         # Step 1: Fetch sitemap
         sitemap_url = competitor.sitemap_url or f"https://{competitor.domain}/sitemap.xml"
         urls = await fetch_sitemap_urls(sitemap_url)
-        job.progress = 20
-        await db.commit()
+        await progress.update(20)
 
         if not urls:
             # Fallback: try common pages
@@ -124,6 +159,8 @@ async def analyze_competitor(db: AsyncSession, competitor_id: int) -> Collection
         all_keywords_text = []
         pages_crawled = 0
         for i, url in enumerate(urls[:50]):
+            if await progress.should_stop():
+                break
             page_data = await crawl_page(url)
             if page_data:
                 page = CompetitorPage(
@@ -153,8 +190,8 @@ async def analyze_competitor(db: AsyncSession, competitor_id: int) -> Collection
                         "in_meta": 1 if ngram in page_data["meta_description"].lower() else 0,
                     })
 
-            job.progress = 20 + (60 * (i + 1) / min(len(urls), 50))
-            await db.commit()
+            # Pages stay pending in the session; only progress is persisted per URL
+            await progress.update(20 + (60 * (i + 1) / min(len(urls), 50)))
 
         # Step 3: Aggregate and save competitor keywords
         kw_agg = {}
@@ -167,12 +204,18 @@ async def analyze_competitor(db: AsyncSession, competitor_id: int) -> Collection
             kw_agg[kw]["in_h1"] += item["in_h1"]
             kw_agg[kw]["in_meta"] += item["in_meta"]
 
-        # Delete old keywords for this competitor
-        old_kws = await db.execute(
+        old_kws = (await db.execute(
             select(CompetitorKeyword).where(CompetitorKeyword.competitor_id == competitor.id)
-        )
-        for old in old_kws.scalars().all():
-            await db.delete(old)
+        )).scalars().all()
+        stop_reason = await progress.should_stop()
+        if stop_reason:
+            # Partial crawl: keep the previous keyword set and only add what's new
+            existing = {old.keyword for old in old_kws}
+            kw_agg = {kw: agg for kw, agg in kw_agg.items() if kw not in existing}
+        else:
+            # Full crawl replaces the old keywords for this competitor
+            for old in old_kws:
+                await db.delete(old)
 
         saved = 0
         for kw_text, agg in kw_agg.items():
@@ -190,14 +233,22 @@ async def analyze_competitor(db: AsyncSession, competitor_id: int) -> Collection
                 saved += 1
 
         competitor.last_crawled = datetime.utcnow()
-        competitor.total_pages = pages_crawled
         job.keywords_found = saved
-        job.status = "completed"
-        job.progress = 100
         job.completed_at = datetime.utcnow()
+        if stop_reason:
+            job.status = "cancelled" if stop_reason == "cancelled" else "failed"
+            job.error_message = progress.stop_message()
+        else:
+            competitor.total_pages = pages_crawled
+            job.status = "completed"
+            job.progress = 100
         await db.commit()
+        publish_job(job)
 
-        logger.info(f"Competitor analysis for {competitor.domain}: {pages_crawled} pages, {saved} keywords")
+        logger.info(
+            f"Competitor analysis for {competitor.domain} {job.status}: "
+            f"{pages_crawled} pages, {saved} keywords"
+        )
 
     except Exception as e:
         logger.error(f"Competitor analysis failed for {competitor.domain}: {e}")
@@ -205,6 +256,7 @@ async def analyze_competitor(db: AsyncSession, competitor_id: int) -> Collection
         job.error_message = str(e)
         job.completed_at = datetime.utcnow()
         await db.commit()
+        publish_job(job)
 
     return job
 
@@ -1,33 +1,127 @@
 import logging
 import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from pytrends.request import TrendReq
+from pytrends.exceptions import ResponseError
+from backend.config import settings
+from backend.services import trends_cache
 from backend.utils.rate_limiter import trends_limiter
+from backend.utils.upstream_health import trends_health, THROTTLE_STATUSES
 
 logger = logging.getLogger(__name__)
 
+BATCH_SIZE = 5  # pytrends compares at most 5 keywords per request
+ANCHORED_BATCH_SIZE = BATCH_SIZE - 1  # room for the anchor keyword
+
+
+class TrendsSessionPool:
+    """
+    Dedicated thread pool for pytrends calls.
+
+    Each worker thread keeps its own TrendReq, so the Google cookie handshake
+    happens once per session instead of once per batch, and Trends calls don't
+    queue behind other work in the loop's default executor. A session is
+    rebuilt when it is too old, has no NID cookie, hits a rate-limit/response
+    error, or fails several times in a row.
+    """
+
+    def __init__(self, workers: int, max_age: float, max_errors: int):
+        self.workers = workers
+        self.max_age = max_age
+        self.max_errors = max_errors
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trends")
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "sessions_created": 0, "rotations": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _healthy(self) -> bool:
+        local = self._local
+        return (
+            getattr(local, "session", None) is not None
+            and bool(local.session.cookies)
+            and time.monotonic() - local.created_at < self.max_age
+            and local.errors < self.max_errors
+        )
+
+    def session(self) -> TrendReq:
+        """This thread's TrendReq, rebuilt if it failed its health check."""
+        local = self._local
+        if not self._healthy():
+            if getattr(local, "session", None) is not None:
+                self._count("rotations")
+            local.session = TrendReq(hl="en-US", tz=360)
+            local.created_at = time.monotonic()
+            local.errors = 0
+            self._count("sessions_created")
+        return local.session
+
+    def succeeded(self):
+        self._local.errors = 0
+        self._count("requests")
+
+    def failed(self, error: Exception):
+        self._count("requests")
+        self._count("errors")
+        if isinstance(error, ResponseError):
+            # 429s and bad responses are tied to the cookie; start fresh next time
+            self._local.errors = self.max_errors
+        else:
+            self._local.errors = getattr(self._local, "errors", 0) + 1
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {**self._stats, "workers": self.workers}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+trends_sessions = TrendsSessionPool(
+    workers=settings.trends_workers,
+    max_age=settings.trends_session_max_age,
+    max_errors=settings.trends_session_max_errors,
+)
+
+
+def _recent_score(values: list[float]) -> float:
+    """Average of the last 4 data points."""
+    recent = values[-4:]
+    return sum(recent) / len(recent) if recent else 0.0
+
 
 def _fetch_trends_sync(keywords: list[str], timeframe: str = "today 3-m", geo: str = "") -> dict:
-    """Synchronous pytrends fetch (runs in executor)."""
-    pytrends = TrendReq(hl="en-US", tz=360)
+    """Synchronous pytrends fetch (runs on a trends_sessions worker thread)."""
     # pytrends only handles up to 5 keywords at once
-    batch = keywords[:5]
+    batch = keywords[:BATCH_SIZE]
     result = {
         "interest_over_time": {},
         "related_queries": {},
         "rising": [],
     }
     try:
+        pytrends = trends_sessions.session()
         pytrends.build_payload(batch, cat=0, timeframe=timeframe, geo=geo)
         iot = pytrends.interest_over_time()
         if not iot.empty:
+            # Points are evenly spaced; start + step is enough to rebuild the dates
+            step = (iot.index[1] - iot.index[0]).total_seconds() if len(iot.index) > 1 else 86400
+            result["timeline"] = {"start": iot.index[0].isoformat(), "step_seconds": int(step)}
             for kw in batch:
                 if kw in iot.columns:
                     values = iot[kw].tolist()
                     result["interest_over_time"][kw] = values
-                    # Average of last 4 data points as score
-                    recent = values[-4:] if len(values) >= 4 else values
-                    result["interest_over_time"][f"{kw}_score"] = sum(recent) / len(recent)
+                    result["interest_over_time"][f"{kw}_score"] = _recent_score(values)
 
         related = pytrends.related_queries()
         for kw in batch:
@@ -40,33 +134,143 @@ def _fetch_trends_sync(keywords: list[str], timeframe: str = "today 3-m", geo: s
                     for _, row in rising.head(10).iterrows():
                         result["rising"].append({
                             "keyword": row["query"],
-                            "value": row["value"],
+                            "value": int(row["value"]),
                             "parent": kw,
                         })
+        trends_sessions.succeeded()
     except Exception as e:
         logger.warning(f"Google Trends error for {batch}: {e}")
+        trends_sessions.failed(e)
+        result["error"] = str(e)
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        if isinstance(e, ResponseError) and status in THROTTLE_STATUSES:
+            result["throttled"] = f"HTTP {status}"
 
     return result
 
 
 async def fetch_trends(keywords: list[str], timeframe: str = "today 3-m", geo: str = "") -> dict:
-    """Async wrapper for pytrends."""
+    """Async wrapper for pytrends; results are cached per (keywords, timeframe, geo)."""
+    keywords = keywords[:BATCH_SIZE]
+    cached = await trends_cache.get_cached(keywords, timeframe, geo)
+    if cached is not None:
+        cached["cached"] = True
+        return cached
     await trends_limiter.acquire()
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, partial(_fetch_trends_sync, keywords, timeframe, geo))
+    result = await trends_sessions.run(_fetch_trends_sync, keywords, timeframe, geo)
+    if "throttled" in result:
+        await trends_health.record("throttled", result["throttled"])
+    elif "error" in result:
+        await trends_health.record("error")
+    else:
+        await trends_health.record("ok" if result["interest_over_time"] else "empty")
+        await trends_cache.store(keywords, timeframe, geo, result)
+    return result
+
 
+async def fetch_trends_batched(
+    keywords: list[str],
+    timeframe: str = "today 3-m",
+    geo: str = "",
+    anchor: str | None = None,
+) -> dict:
+    """
+    Fetch trends for more than 5 keywords by batching. Batches are dispatched
+    concurrently; trends_limiter sets the actual request pace.
 
-async def fetch_trends_batched(keywords: list[str], timeframe: str = "today 3-m", geo: str = "") -> dict:
-    """Fetch trends for more than 5 keywords by batching."""
+    Google scales every request to its own peak, so raw values from different
+    batches aren't comparable. With an anchor, each batch is 4 keywords plus
+    the anchor and each series is divided by the anchor's mean in that batch.
+    Scores are those anchor units times settings.trends_anchor_scale, capped
+    at 100, so they compare across batches and across runs. Keywords from a
+    batch where the anchor came back empty are left out, and keywords with an
+    unexpired anchor-unit series in the cache aren't fetched again.
+
+    "timeline" (start and step of the series) comes from a fresh fetch when
+    there is one; "timelines" has each keyword's own, since a batch served
+    from the result cache may cover an older window.
+    """
     combined = {
         "interest_over_time": {},
         "related_queries": {},
         "rising": [],
     }
-    for i in range(0, len(keywords), 5):
-        batch = keywords[i:i + 5]
-        result = await fetch_trends(batch, timeframe, geo)
-        combined["interest_over_time"].update(result["interest_over_time"])
-        combined["related_queries"].update(result["related_queries"])
-        combined["rising"].extend(result["rising"])
+    anchor_units: dict[str, list[float]] = {}
+    if anchor:
+        keywords = [kw for kw in keywords if kw != anchor]
+        # Keywords recently fetched against the same anchor are already on the common scale
+        reused = await trends_cache.get_anchor_series(keywords, anchor, timeframe, geo)
+        for kw, entry in reused.items():
+            anchor_units[kw] = entry["series"]
+            if entry["related"]:
+                combined["related_queries"][kw] = entry["related"]
+            combined["rising"].extend(entry["rising"])
+        keywords = [kw for kw in keywords if kw not in reused]
+        combined["reused"] = list(reused)
+
+    size = ANCHORED_BATCH_SIZE if anchor else BATCH_SIZE
+    batches = [keywords[i:i + size] for i in range(0, len(keywords), size)]
+    results = await asyncio.gather(*[
+        fetch_trends(batch + [anchor] if anchor else batch, timeframe, geo) for batch in batches
+    ])
+
+    # Requests that actually went out to Google (cache hits cost nothing)
+    combined["requests"] = sum(1 for result in results if not result.get("cached"))
+
+    errors = [result["error"] for result in results if "error" in result]
+    if errors:
+        combined["error"] = "; ".join(errors)
+
+    fetched: dict[str, dict] = {}
+    timelines: dict[str, dict] = {}
+    timeline_cached = True
+    for batch, result in zip(batches, results):
+        combined["related_queries"].update(
+            {kw: queries for kw, queries in result["related_queries"].items() if kw != anchor}
+        )
+        combined["rising"].extend(item for item in result["rising"] if item["parent"] != anchor)
+        if "timeline" in result:
+            # A cached batch may come from an earlier fetch window than the others,
+            # so each keyword keeps its own batch's dates; the shared timeline is
+            # taken from a fresh fetch when there is one
+            if "timeline" not in combined or (timeline_cached and not result.get("cached")):
+                combined["timeline"] = result["timeline"]
+                timeline_cached = bool(result.get("cached"))
+            for kw in batch:
+                if kw in result["interest_over_time"]:
+                    timelines[kw] = result["timeline"]
+        iot = result["interest_over_time"]
+        if not anchor:
+            combined["interest_over_time"].update(iot)
+            continue
+
+        anchor_values = iot.get(anchor) or []
+        anchor_mean = sum(anchor_values) / len(anchor_values) if anchor_values else 0.0
+        if anchor_mean <= 0:
+            logger.warning(f"Trends anchor '{anchor}' empty for batch {batch}; skipping its scores")
+            continue
+        for kw in batch:
+            if kw in iot:
+                anchor_units[kw] = [v / anchor_mean for v in iot[kw]]
+                if "error" not in result and not result.get("cached"):
+                    # Cache hits were stored when fetched; storing again would renew their TTL
+                    fetched[kw] = {
+                        "series": anchor_units[kw],
+                        "related": result["related_queries"].get(kw),
+                        "rising": [item for item in result["rising"] if item["parent"] == kw],
+                    }
+
+    if timelines:
+        combined["timelines"] = timelines
+
+    if anchor:
+        await trends_cache.store_anchor_series(fetched, anchor, timeframe, geo)
+        # Fixed conversion, so a keyword's score doesn't depend on what it was fetched with
+        scale = settings.trends_anchor_scale
+        for kw, series in anchor_units.items():
+            values = [round(min(100.0, v * scale), 2) for v in series]
+            combined["interest_over_time"][kw] = values
+            combined["interest_over_time"][f"{kw}_score"] = _recent_score(values)
+        combined["anchor"] = anchor
+        combined["anchor_units"] = anchor_units
     return combined
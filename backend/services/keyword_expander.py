@@ -1,16 +1,22 @@
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.dialects.sqlite import insert
 
+from backend.config import settings
 from backend.models.keyword import Keyword
 from backend.models.collection_job import CollectionJob
+from backend.models.seed_expansion import SeedExpansion
 from backend.services.autocomplete import expand_keyword
-from backend.services.google_trends import fetch_trends
+from backend.services.google_trends import fetch_trends_batched, BATCH_SIZE, ANCHORED_BATCH_SIZE
 from backend.services.related_searches import fetch_related_searches
 from backend.services.keyword_classifier import classify_keyword
 from backend.services.heat_ranker import calculate_heat_score
-from backend.utils.text_processing import deduplicate_keywords
+from backend.tasks.events import publish_job
+from backend.tasks.progress import ProgressReporter
+from backend.utils.text_processing import clean_keyword, deduplicate_keywords
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +29,25 @@ async def run_expansion(
     use_trends: bool = True,
     use_serp: bool = True,
     existing_job_id: int | None = None,
+    force: bool = False,
 ) -> CollectionJob:
-    """Run full keyword expansion pipeline for a seed keyword."""
+    """Run full keyword expansion pipeline for a seed keyword.
+
+    Sources that already ran for this seed within settings.seed_freshness_hours
+    are skipped (unless force=True); if none are left, the job completes
+    immediately and the earlier results stand.
+
+    Between steps the job checks for cancellation or its wall-clock timeout;
+    if either hits, the remaining sources are skipped and whatever was
+    discovered so far is still saved.
+    """
+    # One form of the seed for freshness, stored children and upstream queries, so
+    # "AI Video " and "ai video" are the same seed. Children saved before seeds
+    # were normalized carry the raw form.
+    raw_seed = seed_keyword
+    seed_keyword = clean_keyword(seed_keyword)
+    seed_parents = [seed_keyword] if raw_seed == seed_keyword else [seed_keyword, raw_seed]
+
     # Reuse an existing job record (created by the router) or create a new one
     if existing_job_id is not None:
         job = await db.get(CollectionJob, existing_job_id)
@@ -43,31 +66,100 @@ async def run_expansion(
         db.add(job)
         await db.commit()
         await db.refresh(job)
+    publish_job(job)
 
+    progress = ProgressReporter(job.id, timeout=settings.job_timeouts.get("expansion"))
     all_discovered = {}  # keyword_text -> {sources, autocomplete_rank, ...}
+    succeeded = set()  # sources that returned data with no upstream errors
     try:
+        # Step 0: Skip sources this seed was expanded with recently
+        freshness = (await db.execute(
+            select(SeedExpansion).where(SeedExpansion.seed == seed_keyword)
+        )).scalar_one_or_none()
+        reused = {}  # source -> (job id, expanded at) of the run whose results stand
+        if freshness and not force:
+            cutoff = datetime.utcnow() - timedelta(hours=settings.seed_freshness_hours)
+            if use_autocomplete and _fresh(freshness.autocomplete_at, cutoff) and (freshness.autocomplete_depth or 0) >= depth:
+                use_autocomplete = False
+                reused["autocomplete"] = (freshness.autocomplete_job_id or freshness.last_job_id, freshness.autocomplete_at)
+            if use_trends and _fresh(freshness.trends_at, cutoff):
+                use_trends = False
+                reused["trends"] = (freshness.trends_job_id or freshness.last_job_id, freshness.trends_at)
+            if use_serp and _fresh(freshness.serp_at, cutoff):
+                use_serp = False
+                reused["serp"] = (freshness.serp_job_id or freshness.last_job_id, freshness.serp_at)
+            if reused:
+                job.params = json.dumps({
+                    **json.loads(job.params or "{}"),
+                    "reused_sources": {source: job_id for source, (job_id, _) in reused.items()},
+                })
+                # Commit now: progress updates write the job row from their own session
+                await db.commit()
+            if reused and not (use_autocomplete or use_trends or use_serp):
+                # Point the job at the run whose results stand (the oldest, if the
+                # sources came from different runs) so the UI can say so
+                reused_job_id, reused_at = min(reused.values(), key=lambda r: r[1])
+                job.params = json.dumps({
+                    **json.loads(job.params),
+                    "reused_job_id": reused_job_id,
+                    "reused_at": reused_at.isoformat(),
+                })
+                # What the reused runs left on file for this seed, not just what they added
+                job.keywords_found = (await db.execute(
+                    select(func.count()).select_from(Keyword).where(Keyword.parent_keyword.in_(seed_parents))
+                )).scalar()
+                job.status = "completed"
+                job.progress = 100
+                job.completed_at = datetime.utcnow()
+                await db.commit()
+                publish_job(job)
+                logger.info(
+                    f"Expansion job {job.id}: '{seed_keyword}' expanded recently "
+                    f"(job {reused_job_id}), reusing results"
+                )
+                return job
+
         # Step 1: Autocomplete expansion
         if use_autocomplete:
-            job.progress = 10
-            await db.commit()
-            ac_keywords = await expand_keyword(seed_keyword, depth=depth)
+            await progress.update(10)
+            ac_errors = []
+            ac_keywords = await expand_keyword(
+                seed_keyword, depth=depth, should_stop=progress.should_stop, errors=ac_errors,
+            )
+            if ac_keywords and not ac_errors:
+                succeeded.add("autocomplete")
             for i, kw in enumerate(ac_keywords):
                 if kw not in all_discovered:
                     all_discovered[kw] = {"sources": set(), "autocomplete_rank": None}
                 all_discovered[kw]["sources"].add("autocomplete")
                 if all_discovered[kw]["autocomplete_rank"] is None:
                     all_discovered[kw]["autocomplete_rank"] = i + 1
-            job.progress = 40
-            await db.commit()
+            await progress.update(40)
 
         # Step 2: Google Trends
         trends_data = {}
-        if use_trends:
-            job.progress = 50
-            await db.commit()
+        if use_trends and not await progress.should_stop():
+            await progress.update(50)
             # Pick top autocomplete keywords + seed for trends
-            trends_seeds = [seed_keyword] + list(all_discovered.keys())[:9]
-            trends_data = await fetch_trends(trends_seeds[:5])
+            if "autocomplete" in reused:
+                # Autocomplete was skipped as fresh; use its stored results instead
+                result = await db.execute(
+                    select(Keyword.keyword)
+                    .where(Keyword.parent_keyword.in_(seed_parents))
+                    .order_by(Keyword.autocomplete_rank.is_(None), Keyword.autocomplete_rank)
+                    .limit(9)
+                )
+                trends_seeds = [seed_keyword] + list(result.scalars().all())
+            else:
+                trends_seeds = [seed_keyword] + list(all_discovered.keys())[:9]
+            # Same anchored scale as the Trends refresh, so trends_score means one thing;
+            # one request's worth of keywords
+            anchor = settings.trends_anchor_keyword or None
+            trends_data = await fetch_trends_batched(
+                trends_seeds[:ANCHORED_BATCH_SIZE if anchor else BATCH_SIZE], anchor=anchor,
+            )
+            if trends_data.get("interest_over_time") and "error" not in trends_data:
+                succeeded.add("trends")
 
             # Add related queries from trends
             for parent_kw, related_list in trends_data.get("related_queries", {}).items():
@@ -76,49 +168,47 @@ async def run_expansion(
                         all_discovered[kw] = {"sources": set(), "autocomplete_rank": None}
                     all_discovered[kw]["sources"].add("trends")
 
-            # Add rising keywords
+            # Add rising related queries as discoveries; is_rising itself is only
+            # set by the rising detector from stored series
             for item in trends_data.get("rising", []):
                 kw = item["keyword"]
                 if kw not in all_discovered:
-                    all_discovered[kw] = {"sources": set(), "autocomplete_rank": None, "is_rising": True}
+                    all_discovered[kw] = {"sources": set(), "autocomplete_rank": None}
                 all_discovered[kw]["sources"].add("trends")
-                all_discovered[kw]["is_rising"] = True
 
-            job.progress = 65
-            await db.commit()
+            await progress.update(65)
 
         # Step 3: SERP related searches
-        if use_serp:
-            job.progress = 70
-            await db.commit()
+        if use_serp and not await progress.should_stop():
+            await progress.update(70)
             serp_data = await fetch_related_searches(seed_keyword)
+            if (serp_data["related"] or serp_data["people_also_ask"]) and "error" not in serp_data:
+                succeeded.add("serp")
             for kw in serp_data.get("related", []) + serp_data.get("people_also_ask", []):
                 if kw not in all_discovered:
                     all_discovered[kw] = {"sources": set(), "autocomplete_rank": None}
                 all_discovered[kw]["sources"].add("serp")
-            job.progress = 80
-            await db.commit()
+            await progress.update(80)
 
-        # Step 4: Save to database
-        job.progress = 85
-        await db.commit()
+        # Step 4: Save to database (partial results too, if we're stopping early)
+        stop_reason = await progress.should_stop()
+        await progress.update(85)
         saved_count = 0
         for kw_text, info in all_discovered.items():
             existing = await db.execute(select(Keyword).where(Keyword.keyword == kw_text))
             existing_kw = existing.scalar_one_or_none()
 
-            # Trends score for this keyword
-            trends_score = trends_data.get("interest_over_time", {}).get(f"{kw_text}_score", 0)
-            is_rising = info.get("is_rising", False)
+            # Trends score for this keyword (None if Trends didn't measure it this run)
+            trends_score = trends_data.get("interest_over_time", {}).get(f"{kw_text}_score")
 
             if existing_kw:
                 existing_kw.source_count = max(existing_kw.source_count, len(info["sources"]))
                 if info["autocomplete_rank"] and (not existing_kw.autocomplete_rank or info["autocomplete_rank"] < existing_kw.autocomplete_rank):
                     existing_kw.autocomplete_rank = info["autocomplete_rank"]
-                if trends_score > existing_kw.trends_score:
+                if trends_score is not None:
+                    # A fresh measurement on the refresh job's scale replaces the old one
                     existing_kw.trends_score = trends_score
-                if is_rising:
-                    existing_kw.is_rising = True
+                    existing_kw.trends_refreshed_at = datetime.utcnow()
                 existing_kw.last_updated = datetime.utcnow()
                 existing_kw.heat_score = calculate_heat_score(
                     trends_score=existing_kw.trends_score,
@@ -130,19 +220,18 @@ async def run_expansion(
             else:
                 source_count = len(info["sources"])
                 heat = calculate_heat_score(
-                    trends_score=trends_score,
+                    trends_score=trends_score or 0,
                     autocomplete_rank=info["autocomplete_rank"],
                     source_count=source_count,
-                    is_rising=is_rising,
                     competition=None,
                 )
                 new_kw = Keyword(
                     keyword=kw_text,
                     source=",".join(info["sources"]),
                     heat_score=heat,
-                    trends_score=trends_score,
+                    trends_score=trends_score or 0,
+                    trends_refreshed_at=datetime.utcnow() if trends_score is not None else None,
                     autocomplete_rank=info["autocomplete_rank"],
-                    is_rising=is_rising,
                     parent_keyword=seed_keyword,
                     expansion_depth=depth,
                     source_count=source_count,
@@ -153,19 +242,47 @@ async def run_expansion(
         await db.commit()
 
         # Step 5: Classify keywords
-        job.progress = 90
-        await db.commit()
-        result = await db.execute(select(Keyword).where(Keyword.parent_keyword == seed_keyword))
+        await progress.update(90)
+        result = await db.execute(select(Keyword).where(Keyword.parent_keyword.in_(seed_parents)))
         keywords_to_classify = result.scalars().all()
         for kw in keywords_to_classify:
             await classify_keyword(db, kw)
         await db.commit()
 
+        now = datetime.utcnow()
+        if stop_reason:
+            job.status = "cancelled" if stop_reason == "cancelled" else "failed"
+            job.error_message = progress.stop_message()
+            job.keywords_found = saved_count
+            job.completed_at = now
+            await db.commit()
+            publish_job(job)
+            logger.info(f"Expansion job {job.id} stopped ({stop_reason}): kept {saved_count} new keywords")
+            return job
+
+        # Remember which sources succeeded so repeat requests can reuse them. A
+        # source that came back empty or throttled isn't marked fresh, so the
+        # next request retries it. Upsert, since the same seed may be expanding
+        # concurrently elsewhere.
+        ran = {"last_job_id": job.id, "keywords_found": saved_count, "last_expanded_at": now}
+        if "autocomplete" in succeeded:
+            ran.update(autocomplete_at=now, autocomplete_depth=depth, autocomplete_job_id=job.id)
+        if "trends" in succeeded:
+            ran.update(trends_at=now, trends_job_id=job.id)
+        if "serp" in succeeded:
+            ran.update(serp_at=now, serp_job_id=job.id)
+        await db.execute(
+            insert(SeedExpansion)
+            .values(seed=seed_keyword, **ran)
+            .on_conflict_do_update(index_elements=["seed"], set_=ran)
+        )
+
         job.status = "completed"
         job.keywords_found = saved_count
         job.progress = 100
-        job.completed_at = datetime.utcnow()
+        job.completed_at = now
         await db.commit()
+        publish_job(job)
         logger.info(f"Expansion job {job.id} completed: {saved_count} new keywords for '{seed_keyword}'")
 
     except Exception as e:
@@ -174,5 +291,10 @@ async def run_expansion(
         job.error_message = str(e)
         job.completed_at = datetime.utcnow()
         await db.commit()
+        publish_job(job)
 
     return job
+
+
+def _fresh(ran_at: datetime | None, cutoff: datetime) -> bool:
+    return ran_at is not None and ran_at >= cutoff
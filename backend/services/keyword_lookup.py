@@ -0,0 +1,20 @@
+"""Bulk lookups of Keyword rows by text."""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from backend.models.keyword import Keyword
+
+# Stay well under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+async def resolve_keywords(db: AsyncSession, texts) -> dict[str, Keyword]:
+    """Map keyword texts to their Keyword rows with one IN query per chunk; unknown texts are left out."""
+    unique = list(dict.fromkeys(texts))
+    found: dict[str, Keyword] = {}
+    for i in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+        chunk = unique[i:i + LOOKUP_CHUNK_SIZE]
+        result = await db.execute(select(Keyword).where(Keyword.keyword.in_(chunk)))
+        for kw in result.scalars().all():
+            found[kw.keyword] = kw
+    return found
@@ -0,0 +1,102 @@
+"""
+Trends refresh planner.
+
+Each keyword gets a refresh interval from its heat tier, shortened when its
+recent TrendSnapshots are volatile. Keywords past their interval are ranked
+by expected value (heat x how overdue x volatility) and the run's Trends
+request budget goes to the top of that list.
+"""
+import logging
+import statistics
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from backend.config import settings
+from backend.models.keyword import Keyword
+from backend.models.trend_snapshot import TrendSnapshot
+from backend.services.google_trends import BATCH_SIZE, ANCHORED_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Refreshes share a Trends request with the anchor keyword when one is configured
+KEYWORDS_PER_REQUEST = ANCHORED_BATCH_SIZE if settings.trends_anchor_keyword else BATCH_SIZE
+
+# (minimum heat score, base refresh interval in days) — hotter keywords refresh more often
+HEAT_TIERS = [(70, 1), (50, 2), (30, 4), (15, 7), (0, 14)]
+
+VOLATILITY_WINDOW_DAYS = 60
+
+
+def base_interval_days(heat_score: float) -> float:
+    for min_heat, days in HEAT_TIERS:
+        if heat_score >= min_heat:
+            return days
+    return HEAT_TIERS[-1][1]
+
+
+def volatility(scores: list[float]) -> float:
+    """Coefficient of variation of past trends scores, capped at 2."""
+    if len(scores) < 2:
+        return 0.0
+    mean = statistics.fmean(scores)
+    if mean <= 0:
+        return 0.0
+    return min(statistics.pstdev(scores) / mean, 2.0)
+
+
+def refresh_interval_days(heat_score: float, vol: float) -> float:
+    """Volatile keywords refresh up to 3x sooner than their heat tier says, never under a day."""
+    return max(base_interval_days(heat_score) / (1 + vol), 1.0)
+
+
+async def plan_trends_refresh(db: AsyncSession, budget_requests: int) -> dict:
+    """Pick the keywords most worth a Trends refresh within the request budget."""
+    now = datetime.utcnow()
+    rows = (await db.execute(
+        select(Keyword.id, Keyword.heat_score, Keyword.trends_refreshed_at, Keyword.first_seen)
+    )).all()
+
+    history: dict[int, list[float]] = {}
+    snapshot_rows = await db.execute(
+        select(TrendSnapshot.keyword_id, TrendSnapshot.trends_score)
+        .where(TrendSnapshot.snapshot_date >= now - timedelta(days=VOLATILITY_WINDOW_DAYS))
+    )
+    for keyword_id, score in snapshot_rows.all():
+        history.setdefault(keyword_id, []).append(score or 0.0)
+
+    candidates = []
+    for keyword_id, heat, refreshed_at, first_seen in rows:
+        heat = heat or 0.0
+        vol = volatility(history.get(keyword_id, []))
+        interval = refresh_interval_days(heat, vol)
+        if refreshed_at is None:
+            # Never refreshed: always due, and older keywords first
+            age_days = (now - (first_seen or now)).total_seconds() / 86400
+            overdue = 1.0 + age_days / interval
+        else:
+            overdue = (now - refreshed_at).total_seconds() / 86400 / interval
+        if overdue >= 1.0:
+            value = (heat + 1) * overdue * (1 + vol)
+            candidates.append((value, keyword_id))
+
+    candidates.sort(reverse=True)
+    budget_keywords = budget_requests * KEYWORDS_PER_REQUEST
+    selected_ids = [keyword_id for _, keyword_id in candidates[:budget_keywords]]
+
+    keywords = []
+    if selected_ids:
+        result = await db.execute(select(Keyword).where(Keyword.id.in_(selected_ids)))
+        by_id = {kw.id: kw for kw in result.scalars().all()}
+        keywords = [by_id[i] for i in selected_ids if i in by_id]
+
+    logger.info(
+        f"Refresh plan: {len(candidates)}/{len(rows)} keywords due, "
+        f"{len(keywords)} selected for a budget of {budget_requests} requests"
+    )
+    return {
+        "keywords": keywords,
+        "total": len(rows),
+        "due": len(candidates),
+        "budget_requests": budget_requests,
+    }
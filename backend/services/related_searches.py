@@ -2,6 +2,7 @@ import httpx
 import logging
 from bs4 import BeautifulSoup
 from backend.utils.rate_limiter import serp_limiter
+from backend.utils.upstream_health import serp_health, throttle_signal
 from backend.utils.text_processing import clean_keyword
 
 logger = logging.getLogger(__name__)
@@ -16,7 +17,7 @@ HEADERS = {
 
 
 async def fetch_related_searches(query: str) -> dict:
-    """Scrape Google SERP for related searches and People Also Ask."""
+    """Scrape Google SERP for related searches and People Also Ask ("error" set if the fetch failed)."""
     await serp_limiter.acquire()
     result = {"related": [], "people_also_ask": []}
 
@@ -27,8 +28,16 @@ async def fetch_related_searches(query: str) -> dict:
                 params={"q": query, "hl": "en", "num": 10},
                 headers=HEADERS,
             )
+            throttled = throttle_signal(resp)
+            if throttled:
+                logger.warning(f"SERP fetch throttled for '{query}': {throttled}")
+                await serp_health.record("throttled", throttled)
+                result["error"] = throttled
+                return result
             if resp.status_code != 200:
                 logger.warning(f"SERP fetch failed for '{query}': HTTP {resp.status_code}")
+                await serp_health.record("error")
+                result["error"] = f"HTTP {resp.status_code}"
                 return result
 
             soup = BeautifulSoup(resp.text, "lxml")
@@ -57,8 +66,11 @@ async def fetch_related_searches(query: str) -> dict:
                         if cleaned and len(cleaned) > 2:
                             result["related"].append(cleaned)
 
+        await serp_health.record("ok" if result["related"] or result["people_also_ask"] else "empty")
     except Exception as e:
         logger.warning(f"SERP scrape failed for '{query}': {e}")
+        await serp_health.record("error")
+        result["error"] = str(e)
 
     # Deduplicate
     result["related"] = list(dict.fromkeys(result["related"]))[:20]
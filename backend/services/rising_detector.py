@@ -0,0 +1,213 @@
+"""
+Rising-trend detection over stored interest series.
+
+The latest TrendSeries of every keyword is laid onto one daily grid (a
+keywords x days matrix, NaN where a series has no point), and the signals are
+computed for all rows at once with NumPy:
+
+- z-score of the last RECENT_DAYS mean against the baseline before it
+- rise percentage of that recent mean over the baseline mean
+- least-squares slope over the last SLOPE_DAYS
+- acceleration: that slope minus the slope of the SLOPE_DAYS before it
+
+A keyword is rising when its recent level is a significant jump above its
+baseline and it is still climbing or speeding up. is_rising and
+rise_percentage are written for every evaluated keyword in one bulk update,
+so keywords that stopped rising are cleared; heat_score is recomputed in the
+same update since it carries a rising bonus. The detector is the only writer
+of is_rising, so a flag on a keyword it can't evaluate (no recent daily
+series, e.g. left over from an older version) is cleared too rather than left
+standing forever.
+"""
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+
+from backend.models.keyword import Keyword
+from backend.models.trend_series import TrendSeries
+from backend.services.heat_ranker import calculate_heat_score
+from backend.services.trend_series import unpack
+
+logger = logging.getLogger(__name__)
+
+WINDOW_DAYS = 56
+RECENT_DAYS = 7
+SLOPE_DAYS = 14
+MAX_SERIES_AGE_DAYS = 30  # older fetches say nothing about the present
+
+MIN_BASELINE_POINTS = 14
+MIN_RECENT_POINTS = 3
+Z_THRESHOLD = 2.0
+MIN_RISE_PERCENT = 25.0
+BREAKOUT_PERCENT = 1000.0  # reported when the baseline is zero
+
+DAY = 86400
+
+
+def _nan_slope(values: np.ndarray) -> np.ndarray:
+    """Per-row least-squares slope (units per day), ignoring NaNs."""
+    mask = ~np.isnan(values)
+    n = mask.sum(axis=1)
+    x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+    y = np.where(mask, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0.0).sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        dy = np.where(mask, y - y_mean[:, None], 0.0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(n >= 2, slope, np.nan)
+
+
+def rising_signals(matrix: np.ndarray) -> dict[str, np.ndarray]:
+    """Compute the detector signals for a keywords x days matrix (last column = today)."""
+    baseline = matrix[:, :-RECENT_DAYS]
+    recent = matrix[:, -RECENT_DAYS:]
+    baseline_n = (~np.isnan(baseline)).sum(axis=1)
+    recent_n = (~np.isnan(recent)).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Masked sums rather than np.nanmean, which warns on rows with no points
+        baseline_mean = np.nansum(baseline, axis=1) / baseline_n
+        baseline_std = np.sqrt(np.nansum((baseline - baseline_mean[:, None]) ** 2, axis=1) / baseline_n)
+        recent_mean = np.nansum(recent, axis=1) / recent_n
+        # Flat baselines would give infinite z; treat a 5%-of-mean wobble as the floor
+        spread = np.maximum(baseline_std, np.maximum(np.abs(baseline_mean) * 0.05, 1e-6))
+        z = (recent_mean - baseline_mean) / spread
+        rise = np.where(
+            baseline_mean > 0,
+            (recent_mean - baseline_mean) / baseline_mean * 100,
+            np.where(recent_mean > 0, BREAKOUT_PERCENT, 0.0),
+        )
+
+    slope = _nan_slope(matrix[:, -SLOPE_DAYS:])
+    prev_slope = _nan_slope(matrix[:, -2 * SLOPE_DAYS:-SLOPE_DAYS])
+    acceleration = slope - prev_slope
+
+    enough = (baseline_n >= MIN_BASELINE_POINTS) & (recent_n >= MIN_RECENT_POINTS)
+    rising = (
+        enough
+        & (z >= Z_THRESHOLD)
+        & (rise >= MIN_RISE_PERCENT)
+        & ((slope > 0) | (acceleration > 0))
+    )
+    return {
+        "evaluated": enough,
+        "rising": rising,
+        "z": z,
+        "rise_percentage": np.minimum(rise, BREAKOUT_PERCENT),
+        "slope": slope,
+        "acceleration": acceleration,
+    }
+
+
+def _latest_series():
+    """Ids of each keyword's latest recent daily series."""
+    return (
+        select(func.max(TrendSeries.id))
+        .where(
+            TrendSeries.fetched_at >= datetime.utcnow() - timedelta(days=MAX_SERIES_AGE_DAYS),
+            TrendSeries.step_seconds == DAY,
+        )
+        .group_by(TrendSeries.keyword_id)
+    )
+
+
+async def _load_matrix(db: AsyncSession) -> tuple[np.ndarray, np.ndarray]:
+    """Latest recent daily series per keyword, aligned on one grid ending at the newest point."""
+    rows = (await db.execute(
+        select(TrendSeries.keyword_id, TrendSeries.start, TrendSeries.data)
+        .where(TrendSeries.id.in_(_latest_series()))
+    )).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, WINDOW_DAYS))
+
+    keyword_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    series = [unpack(r[2]) for r in rows]
+    lengths = np.fromiter((len(s) for s in series), dtype=np.int64, count=len(rows))
+    epoch = datetime(1970, 1, 1)
+    start_days = np.fromiter(((r[1] - epoch).days for r in rows), dtype=np.int64, count=len(rows))
+
+    grid_end = int((start_days + lengths).max())  # one past the newest day
+    grid_start = grid_end - WINDOW_DAYS
+
+    # Flatten every point to (row, day) and scatter into the matrix in one go
+    row_idx = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    col_idx = np.repeat(start_days, lengths) + offsets - grid_start
+    values = np.concatenate(series).astype(np.float64) if series else np.empty(0)
+    keep = (col_idx >= 0) & (col_idx < WINDOW_DAYS)
+
+    matrix = np.full((len(rows), WINDOW_DAYS), np.nan)
+    matrix[row_idx[keep], col_idx[keep]] = values[keep]
+    return keyword_ids, matrix
+
+
+async def detect_rising(db: AsyncSession) -> dict:
+    """
+    Recompute is_rising / rise_percentage (and heat_score with them) for every
+    keyword with a recent daily series, and clear is_rising on flagged
+    keywords that have none.
+    """
+    keyword_ids, matrix = await _load_matrix(db)
+    ids, rising, rise = np.array([], dtype=np.int64), np.array([], dtype=bool), np.array([])
+    if len(keyword_ids):
+        signals = rising_signals(matrix)
+        evaluated = signals["evaluated"]
+        ids = keyword_ids[evaluated]
+        rising = signals["rising"][evaluated]
+        rise = signals["rise_percentage"][evaluated]
+
+    # Everything heat_score needs, for evaluated keywords and currently flagged ones
+    evaluated_ids = {int(kid) for kid in ids}
+    has_series = select(TrendSeries.keyword_id).where(TrendSeries.id.in_(_latest_series()))
+    scoring = {
+        row.id: row for row in (await db.execute(
+            select(
+                Keyword.id, Keyword.is_rising, Keyword.trends_score, Keyword.autocomplete_rank,
+                Keyword.source_count, Keyword.competition, Keyword.search_volume,
+            ).where((Keyword.is_rising == True) | Keyword.id.in_(has_series))
+        )).all()
+    }
+    previously_rising = {kid for kid, row in scoring.items() if row.is_rising}
+
+    def heat(kid: int, is_up: bool) -> float:
+        row = scoring[kid]
+        return calculate_heat_score(
+            trends_score=row.trends_score or 0,
+            autocomplete_rank=row.autocomplete_rank,
+            source_count=row.source_count or 1,
+            is_rising=is_up,
+            competition=row.competition,
+            search_volume=row.search_volume,
+        )
+
+    params = [
+        {
+            "id": int(kid), "is_rising": bool(is_up), "rise_percentage": round(float(pct), 1),
+            "heat_score": heat(int(kid), bool(is_up)),
+        }
+        for kid, is_up, pct in zip(ids, rising, rise)
+        if int(kid) in scoring  # keyword deleted since its series was stored
+    ]
+    # Not enough recent history to tell; the flag can't be backed up, so drop it
+    unevaluated = previously_rising - evaluated_ids
+    params.extend(
+        {"id": kid, "is_rising": False, "rise_percentage": None, "heat_score": heat(kid, False)}
+        for kid in unevaluated
+    )
+    if params:
+        await db.execute(update(Keyword), params)
+    await db.commit()
+
+    cleared = sum(1 for kid, is_up in zip(ids, rising) if not is_up and int(kid) in previously_rising)
+    summary = {
+        "evaluated": len(ids),
+        "rising": int(rising.sum()),
+        "cleared": cleared,
+        "cleared_no_series": len(unevaluated),
+    }
+    logger.info(f"Rising detection: {summary}")
+    return summary
@@ -0,0 +1,135 @@
+"""
+TrendSnapshot history: compaction and bucketed reads.
+
+Snapshots stay at full resolution for settings.snapshot_raw_days, are then
+averaged into one row per keyword per week, and after
+settings.snapshot_weekly_days into one row per month. Cutoffs are aligned to
+bucket boundaries so a bucket is only aggregated once it is complete and never
+produces two rows.
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, literal, cast, Integer
+
+from backend.models.trend_snapshot import TrendSnapshot
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = ("raw", "week", "month")
+
+
+def bucket_start(resolution: str):
+    """
+    SQL expression for the start of the snapshot's week (Monday) or month.
+    Weeks are split at month boundaries so a weekly row never spans two
+    months and later folds cleanly into a single monthly row.
+    """
+    month = func.date(TrendSnapshot.snapshot_date, "start of month")
+    day = month
+    if resolution == "week":
+        day = func.max(func.date(TrendSnapshot.snapshot_date, "weekday 0", "-6 days"), month)
+    # Same text format SQLAlchemy stores DateTimes in, so comparisons with bound datetimes hold
+    return day.concat(" 00:00:00.000000")
+
+
+async def add_snapshots(db: AsyncSession, rows: list[dict]):
+    """Insert raw snapshots ({keyword_id, trends_score, is_rising, ...}) in one statement; the caller commits."""
+    if rows:
+        await db.execute(insert(TrendSnapshot), rows)
+
+
+def _week_floor(dt: datetime) -> datetime:
+    day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def _month_floor(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+async def _downsample(db: AsyncSession, resolution: str, sources: tuple[str, ...], cutoff: datetime) -> int:
+    """Replace `sources` rows older than cutoff with one averaged row per keyword per bucket."""
+    conditions = (
+        TrendSnapshot.resolution.in_(sources),
+        TrendSnapshot.snapshot_date < cutoff,
+    )
+    count = await db.scalar(select(func.count()).select_from(TrendSnapshot).where(*conditions))
+    if not count:
+        return 0
+    bucket = bucket_start(resolution)
+    await db.execute(
+        insert(TrendSnapshot).from_select(
+            ["keyword_id", "trends_score", "is_rising", "rise_percentage", "snapshot_date", "resolution"],
+            select(
+                TrendSnapshot.keyword_id,
+                func.avg(TrendSnapshot.trends_score),
+                cast(func.max(TrendSnapshot.is_rising), Integer),
+                func.avg(TrendSnapshot.rise_percentage),
+                bucket,
+                literal(resolution),
+            )
+            .where(*conditions)
+            .group_by(TrendSnapshot.keyword_id, bucket),
+        )
+    )
+    await db.execute(delete(TrendSnapshot).where(*conditions))
+    return count
+
+
+async def compact_snapshots(db: AsyncSession, raw_days: int, weekly_days: int) -> dict:
+    """Downsample old snapshots: months first, so weekly rows are never averaged twice."""
+    now = datetime.utcnow()
+    month_cutoff = _month_floor(now - timedelta(days=weekly_days))
+    week_cutoff = _week_floor(now - timedelta(days=raw_days))
+    to_month = await _downsample(db, "month", ("raw", "week"), month_cutoff)
+    to_week = await _downsample(db, "week", ("raw",), week_cutoff)
+    await db.commit()
+    return {"to_month": to_month, "to_week": to_week}
+
+
+async def snapshot_history(
+    db: AsyncSession,
+    keyword_id: int,
+    since: datetime | None = None,
+    resolution: str = "raw",
+) -> list[dict]:
+    """
+    Snapshots for a keyword, oldest first. "raw" returns stored rows as they
+    are (older ones already compacted); "week"/"month" average everything
+    into buckets of that size.
+    """
+    conditions = [TrendSnapshot.keyword_id == keyword_id]
+    if since:
+        conditions.append(TrendSnapshot.snapshot_date >= since)
+
+    if resolution == "raw":
+        rows = (await db.execute(
+            select(TrendSnapshot).where(*conditions).order_by(TrendSnapshot.snapshot_date)
+        )).scalars().all()
+        return [
+            {
+                "date": s.snapshot_date.isoformat(),
+                "score": s.trends_score,
+                "is_rising": s.is_rising,
+                "resolution": s.resolution or "raw",
+            }
+            for s in rows
+        ]
+
+    bucket = bucket_start(resolution)
+    rows = (await db.execute(
+        select(bucket, func.avg(TrendSnapshot.trends_score), func.max(TrendSnapshot.is_rising))
+        .where(*conditions)
+        .group_by(bucket)
+        .order_by(bucket)
+    )).all()
+    return [
+        {
+            "date": datetime.fromisoformat(day).isoformat(),
+            "score": round(score or 0.0, 2),
+            "is_rising": bool(is_rising),
+            "resolution": resolution,
+        }
+        for day, score, is_rising in rows
+    ]
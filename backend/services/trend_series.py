@@ -0,0 +1,110 @@
+"""
+Compact storage for full Trends interest-over-time series.
+
+Every Trends fetch of a stored keyword writes one TrendSeries row holding the
+whole series as packed float32 (4 bytes per point) plus its start date and
+step, instead of one row per point. Anchored fetches store values in anchor
+units so series from different runs share a scale. History reads merge the
+overlapping fetch windows, later fetches winning for the dates they cover.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert
+
+from backend.models.trend_series import TrendSeries
+
+DTYPE = np.dtype("<f4")
+
+
+def pack(values) -> bytes:
+    return np.asarray(values, dtype=DTYPE).tobytes()
+
+
+def unpack(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=DTYPE)
+
+
+async def store_series(
+    db: AsyncSession,
+    keyword_ids: dict[str, int],
+    trends_data: dict,
+    timeframe: str = "today 3-m",
+    geo: str = "",
+) -> int:
+    """
+    Add TrendSeries rows for the keywords fetched in a fetch_trends_batched
+    result (keywords served from the series cache were stored when fetched).
+    Uses one bulk insert; the caller commits.
+    """
+    timeline = trends_data.get("timeline")
+    if not timeline:
+        return 0
+    # Per-keyword dates: batches served from the cache may cover an older window
+    timelines = trends_data.get("timelines", {})
+    anchor = trends_data.get("anchor")
+    series = trends_data.get("anchor_units") if anchor else trends_data.get("interest_over_time", {})
+    reused = set(trends_data.get("reused", []))
+    now = datetime.utcnow()
+
+    rows = [
+        {
+            "keyword_id": keyword_ids[kw],
+            "timeframe": timeframe,
+            "geo": geo,
+            "anchor": anchor,
+            "start": datetime.fromisoformat(timelines.get(kw, timeline)["start"]),
+            "step_seconds": timelines.get(kw, timeline)["step_seconds"],
+            "points": len(values),
+            "data": pack(values),
+            "fetched_at": now,
+        }
+        for kw, values in series.items()
+        if kw in keyword_ids and kw not in reused and not kw.endswith("_score") and values
+    ]
+    if rows:
+        await db.execute(insert(TrendSeries), rows)
+    return len(rows)
+
+
+async def load_series(
+    db: AsyncSession,
+    keyword_ids: list[int],
+    since: datetime | None = None,
+) -> dict[int, dict]:
+    """
+    Full stored history per keyword: {keyword_id: {anchor, dates, values}}.
+    One query for all keywords; only series on the keyword's most recent
+    scale (anchor) are merged.
+    """
+    query = (
+        select(TrendSeries)
+        .where(TrendSeries.keyword_id.in_(keyword_ids))
+        .order_by(TrendSeries.keyword_id, TrendSeries.fetched_at)
+    )
+    if since:
+        # A window ends at its fetch time, so earlier fetches hold nothing after `since`
+        query = query.where(TrendSeries.fetched_at >= since)
+    rows = (await db.execute(query)).scalars().all()
+
+    by_keyword: dict[int, list[TrendSeries]] = {}
+    for row in rows:
+        by_keyword.setdefault(row.keyword_id, []).append(row)
+
+    history = {}
+    for keyword_id, fetches in by_keyword.items():
+        anchor = fetches[-1].anchor
+        points: dict[datetime, float] = {}
+        for fetch in fetches:
+            if fetch.anchor != anchor:
+                continue
+            step = timedelta(seconds=fetch.step_seconds)
+            for i, value in enumerate(unpack(fetch.data).tolist()):
+                points[fetch.start + i * step] = value
+        dates = sorted(d for d in points if since is None or d >= since)
+        history[keyword_id] = {
+            "anchor": anchor,
+            "dates": [d.isoformat() for d in dates],
+            "values": [round(points[d], 4) for d in dates],
+        }
+    return history
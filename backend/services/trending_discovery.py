@@ -7,10 +7,17 @@ Trending keyword discovery from multiple sources:
 
 import asyncio
 import logging
+import time
 import xml.etree.ElementTree as ET
+from datetime import datetime
 
 import httpx
 from bs4 import BeautifulSoup
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.services.keyword_lookup import resolve_keywords
+from backend.utils.text_processing import extract_keyphrases
 
 logger = logging.getLogger(__name__)
 
@@ -140,16 +147,178 @@ async def fetch_twitter_trending() -> list[dict]:
 
 # ─── Combined ────────────────────────────────────────────────────────────────
 
+async def _with_deadline(name: str, coro) -> list[dict]:
+    """Run a source fetch under its deadline; a slow or failing source yields no items."""
+    deadline = settings.trending_source_deadlines.get(name, 10.0)
+    try:
+        return await asyncio.wait_for(coro, timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.warning(f"Trending source '{name}' missed its {deadline}s deadline")
+    except Exception as e:
+        logger.warning(f"Trending source '{name}' failed: {e}")
+    return []
+
+
 async def fetch_all_trending() -> dict:
-    """Fetch trending topics from all sources concurrently."""
+    """Fetch trending topics from all sources concurrently, each under its own deadline."""
     google_res, reddit_res, twitter_res = await asyncio.gather(
-        fetch_google_trending(),
-        fetch_reddit_trending(),
-        fetch_twitter_trending(),
-        return_exceptions=True,
+        _with_deadline("google", fetch_google_trending()),
+        _with_deadline("reddit", fetch_reddit_trending()),
+        _with_deadline("twitter", fetch_twitter_trending()),
     )
     return {
-        "google": google_res if isinstance(google_res, list) else [],
-        "reddit": reddit_res if isinstance(reddit_res, list) else [],
-        "twitter": twitter_res if isinstance(twitter_res, list) else [],
+        "google": google_res,
+        "reddit": reddit_res,
+        "twitter": twitter_res,
     }
+
+
+# ─── Seed extraction ─────────────────────────────────────────────────────────
+# Post titles and hashtags make poor expansion seeds: autocomplete rarely has
+# anything for a 100-character headline. Expand short keyphrases instead.
+
+async def extract_discovery_seeds(db: AsyncSession, data: dict, per_source: int = 8, limit: int = 15) -> list[str]:
+    """
+    Turn fetch_all_trending() output into expansion seeds: up to 3 keyphrases
+    per item (Google first), minus phrases already in the keywords table.
+    """
+    phrases = []
+    for source in ("google", "twitter", "reddit"):
+        for item in data.get(source, [])[:per_source]:
+            phrases.extend(extract_keyphrases(item["term"]))
+    phrases = list(dict.fromkeys(phrases))
+
+    known = await resolve_keywords(db, phrases)
+    seeds = [p for p in phrases if p not in known]
+    logger.info(
+        f"Seed extraction: {len(phrases)} keyphrases, {len(phrases) - len(seeds)} already known"
+    )
+    return seeds[:limit]
+
+
+# ─── Cached (stale-while-revalidate) ─────────────────────────────────────────
+
+class TrendingCache:
+    """
+    Per-source stale-while-revalidate cache for the trending page.
+
+    Readers get the last good items from memory immediately. When a source is
+    older than the TTL, one background refresh starts and later readers see
+    the new items once it lands; only a cold source (nothing fetched yet) makes
+    its reader wait, and concurrent readers share that single fetch. A failed
+    or empty fetch keeps the previous items and is retried after retry_after.
+    A warm loop revalidates sources in the background so readers rarely see
+    stale data at all.
+    """
+
+    def __init__(self, fetchers: dict, ttl: float, retry_after: float):
+        self.fetchers = fetchers
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._items: dict[str, list[dict]] = {name: [] for name in fetchers}
+        self._last_success: dict[str, datetime | None] = {name: None for name in fetchers}
+        self._last_error: dict[str, str | None] = {name: None for name in fetchers}
+        self._last_attempt: dict[str, float] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._warm_task: asyncio.Task | None = None
+
+    def _due(self, name: str) -> bool:
+        last = self._last_attempt.get(name)
+        if last is None:
+            return True
+        wait = self.retry_after if self._last_error[name] else self.ttl
+        return time.monotonic() - last >= wait
+
+    def _revalidate(self, name: str) -> asyncio.Task:
+        task = self._tasks.get(name)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh(name), name=f"trending-{name}")
+            self._tasks[name] = task
+        return task
+
+    async def _refresh(self, name: str):
+        self._last_attempt[name] = time.monotonic()
+        error = None
+        try:
+            items = await self.fetchers[name]()
+        except Exception as e:
+            items, error = [], str(e)
+        if items:
+            self._items[name] = items
+            self._last_success[name] = datetime.utcnow()
+            self._last_error[name] = None
+        else:
+            self._last_error[name] = error or "no items returned"
+            logger.warning(f"Trending source '{name}' refresh failed: {self._last_error[name]}")
+
+    async def get(self, name: str) -> list[dict]:
+        if self._due(name):
+            task = self._revalidate(name)
+            if self._last_success[name] is None:
+                await asyncio.shield(task)
+        return self._items[name]
+
+    async def get_all(self) -> dict:
+        names = list(self.fetchers)
+        results = await asyncio.gather(*[self.get(name) for name in names])
+        data = dict(zip(names, results))
+        data["sources"] = self.status()
+        return data
+
+    async def stream(self):
+        """
+        Yield (name, items, error) per source as soon as each is ready, each
+        under its own deadline. A source that misses it yields whatever it
+        had cached (possibly nothing); its fetch keeps running and fills the
+        cache for the next reader.
+        """
+        async def resolve(name: str):
+            deadline = settings.trending_source_deadlines.get(name, 10.0)
+            try:
+                return name, await asyncio.wait_for(self.get(name), timeout=deadline), None
+            except asyncio.TimeoutError:
+                return name, self._items[name], f"timed out after {deadline}s"
+
+        for next_done in asyncio.as_completed([resolve(name) for name in self.fetchers]):
+            yield await next_done
+
+    def source_status(self, name: str) -> dict:
+        success = self._last_success[name]
+        age = (datetime.utcnow() - success).total_seconds() if success else None
+        return {
+            "last_success": success.isoformat() if success else None,
+            "age_seconds": round(age) if age is not None else None,
+            "stale": age is None or age > self.ttl,
+            "last_error": self._last_error[name],
+        }
+
+    def status(self) -> dict:
+        return {name: self.source_status(name) for name in self.fetchers}
+
+    def start(self):
+        self._warm_task = asyncio.create_task(self._warm(), name="trending-warm")
+
+    async def stop(self):
+        tasks = [t for t in [self._warm_task, *self._tasks.values()] if t and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._warm_task = None
+
+    async def _warm(self):
+        while True:
+            for name in self.fetchers:
+                if self._due(name):
+                    self._revalidate(name)
+            await asyncio.sleep(min(self.ttl, self.retry_after))
+
+
+trending_cache = TrendingCache(
+    {
+        "google": fetch_google_trending,
+        "reddit": fetch_reddit_trending,
+        "twitter": fetch_twitter_trending,
+    },
+    ttl=settings.trending_cache_ttl,
+    retry_after=settings.trending_retry_after,
+)
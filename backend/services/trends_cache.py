@@ -0,0 +1,218 @@
+"""
+Persistent cache for Google Trends results.
+
+Two layers, both with a TTL:
+- whole fetch_trends results keyed by (sorted keywords, timeframe, geo), so
+  overlapping calls from expansion, /api/trends/refresh and the scheduler
+  don't each spend one of the ~10 Trends requests per minute;
+- per-keyword series in anchor units (see fetch_trends_batched), so a batched
+  run only fetches keywords whose series with the same anchor has expired.
+
+Cache errors are logged and treated as misses; they never fail a fetch.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, func, bindparam
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.config import settings
+from backend.database import async_session
+from backend.models.trends_cache import TrendsCacheEntry, TrendsAnchorSeries
+
+logger = logging.getLogger(__name__)
+
+# Per-process counters since startup
+_stats = {"hits": 0, "misses": 0, "stores": 0, "series_hits": 0, "series_misses": 0, "errors": 0}
+
+# Hits per cache entry id not yet added to trends_cache.hits. Reads stay
+# read-only; the counts ride along with the next write (store, purge, stats).
+_pending_hits: dict[int, int] = {}
+
+
+def cache_key(keywords: list[str], timeframe: str, geo: str) -> str:
+    raw = json.dumps([sorted(keywords), timeframe, geo], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def get_cached(keywords: list[str], timeframe: str, geo: str) -> dict | None:
+    key = cache_key(keywords, timeframe, geo)
+    try:
+        async with async_session() as db:
+            entry = (await db.execute(
+                select(TrendsCacheEntry).where(
+                    TrendsCacheEntry.cache_key == key,
+                    TrendsCacheEntry.expires_at > datetime.utcnow(),
+                )
+            )).scalar_one_or_none()
+            if entry is None:
+                _stats["misses"] += 1
+                return None
+            _pending_hits[entry.id] = _pending_hits.get(entry.id, 0) + 1
+            _stats["hits"] += 1
+            return json.loads(entry.result)
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Trends cache read failed for {keywords}: {e}")
+        return None
+
+
+async def _flush_hits(db):
+    """Add pending hit counts to their rows in one executemany; the caller commits."""
+    if not _pending_hits:
+        return
+    pending = list(_pending_hits.items())
+    _pending_hits.clear()
+    table = TrendsCacheEntry.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.id == bindparam("entry_id"))
+        .values(hits=table.c.hits + bindparam("n")),
+        [{"entry_id": entry_id, "n": n} for entry_id, n in pending],
+    )
+
+
+async def store(keywords: list[str], timeframe: str, geo: str, result: dict):
+    now = datetime.utcnow()
+    values = {
+        "cache_key": cache_key(keywords, timeframe, geo),
+        "keywords": json.dumps(sorted(keywords), ensure_ascii=False),
+        "timeframe": timeframe,
+        "geo": geo,
+        "result": json.dumps(result, ensure_ascii=False),
+        "hits": 0,
+        "fetched_at": now,
+        "expires_at": now + timedelta(hours=settings.trends_cache_ttl_hours),
+    }
+    try:
+        async with async_session() as db:
+            stmt = insert(TrendsCacheEntry).values(**values)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=["cache_key"],
+                set_={k: stmt.excluded[k] for k in ("result", "hits", "fetched_at", "expires_at")},
+            ))
+            await _flush_hits(db)
+            await db.commit()
+        _stats["stores"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Trends cache write failed for {keywords}: {e}")
+
+
+async def get_anchor_series(keywords: list[str], anchor: str, timeframe: str, geo: str) -> dict[str, dict]:
+    """Unexpired anchor-unit series for the given keywords: {keyword: {series, related, rising}}."""
+    if not keywords:
+        return {}
+    try:
+        async with async_session() as db:
+            rows = (await db.execute(
+                select(TrendsAnchorSeries).where(
+                    TrendsAnchorSeries.keyword.in_(keywords),
+                    TrendsAnchorSeries.anchor == anchor,
+                    TrendsAnchorSeries.timeframe == timeframe,
+                    TrendsAnchorSeries.geo == geo,
+                    TrendsAnchorSeries.expires_at > datetime.utcnow(),
+                )
+            )).scalars().all()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Trends series cache read failed: {e}")
+        return {}
+
+    found = {
+        row.keyword: {
+            "series": json.loads(row.series),
+            "related": json.loads(row.related) if row.related else None,
+            "rising": json.loads(row.rising) if row.rising else [],
+        }
+        for row in rows
+    }
+    _stats["series_hits"] += len(found)
+    _stats["series_misses"] += len(keywords) - len(found)
+    return found
+
+
+async def store_anchor_series(entries: dict[str, dict], anchor: str, timeframe: str, geo: str):
+    """Upsert {keyword: {series, related, rising}} fetched with the given anchor."""
+    if not entries:
+        return
+    now = datetime.utcnow()
+    expires = now + timedelta(hours=settings.trends_series_ttl_hours)
+    rows = [
+        {
+            "keyword": kw,
+            "anchor": anchor,
+            "timeframe": timeframe,
+            "geo": geo,
+            "series": json.dumps(entry["series"]),
+            "related": json.dumps(entry["related"], ensure_ascii=False) if entry.get("related") else None,
+            "rising": json.dumps(entry.get("rising") or [], ensure_ascii=False),
+            "fetched_at": now,
+            "expires_at": expires,
+        }
+        for kw, entry in entries.items()
+    ]
+    try:
+        async with async_session() as db:
+            stmt = insert(TrendsAnchorSeries)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["keyword", "anchor", "timeframe", "geo"],
+                    set_={k: stmt.excluded[k] for k in ("series", "related", "rising", "fetched_at", "expires_at")},
+                ),
+                rows,
+            )
+            await db.commit()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Trends series cache write failed: {e}")
+
+
+async def cache_stats() -> dict:
+    """Process counters plus what's currently stored, for tuning the TTLs."""
+    now = datetime.utcnow()
+    async with async_session() as db:
+        if _pending_hits:
+            await _flush_hits(db)
+            await db.commit()
+        entries, live, total_hits = (await db.execute(
+            select(
+                func.count(),
+                func.count().filter(TrendsCacheEntry.expires_at > now),
+                func.coalesce(func.sum(TrendsCacheEntry.hits), 0),
+            )
+        )).one()
+        series, live_series = (await db.execute(
+            select(func.count(), func.count().filter(TrendsAnchorSeries.expires_at > now))
+        )).one()
+
+    lookups = _stats["hits"] + _stats["misses"]
+    series_lookups = _stats["series_hits"] + _stats["series_misses"]
+    return {
+        "ttl_hours": settings.trends_cache_ttl_hours,
+        "series_ttl_hours": settings.trends_series_ttl_hours,
+        "process": {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+            "series_hit_rate": round(_stats["series_hits"] / series_lookups, 3) if series_lookups else None,
+        },
+        "stored": {
+            "results": entries,
+            "results_live": live,
+            "result_hits": total_hits,
+            "series": series,
+            "series_live": live_series,
+        },
+    }
+
+
+async def purge_expired() -> int:
+    """Delete expired cache rows; returns how many were removed."""
+    now = datetime.utcnow()
+    async with async_session() as db:
+        await _flush_hits(db)
+        results = await db.execute(delete(TrendsCacheEntry).where(TrendsCacheEntry.expires_at <= now))
+        series = await db.execute(delete(TrendsAnchorSeries).where(TrendsAnchorSeries.expires_at <= now))
+        await db.commit()
+    return results.rowcount + series.rowcount
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = {"completed", "failed", "cancelled"}
+
+
+class JobEventBus:
+    """In-process pub/sub for job progress and status changes.
+
+    Each subscriber gets its own bounded queue. Events are full state
+    snapshots of the fields that changed, so when a slow subscriber's
+    queue overflows the oldest event is simply dropped.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+
+    def subscribe(self, job_ids: list[int]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        for job_id in job_ids:
+            self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        for job_id in list(self._subscribers):
+            subs = self._subscribers[job_id]
+            subs.discard(queue)
+            if not subs:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: int, **fields):
+        subs = self._subscribers.get(job_id)
+        if not subs:
+            return
+        event = {"id": job_id, **fields}
+        for queue in subs:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+job_events = JobEventBus()
+
+
+def reuse_fields(job) -> dict:
+    """reused_job_id / reused_at of an expansion answered from an earlier run (None otherwise)."""
+    params = json.loads(job.params or "{}") if job.job_type == "expansion" else {}
+    return {"reused_job_id": params.get("reused_job_id"), "reused_at": params.get("reused_at")}
+
+
+def publish_job(job):
+    """Publish the current status fields of a CollectionJob."""
+    job_events.publish(
+        job.id,
+        status=job.status,
+        progress=job.progress,
+        keywords_found=job.keywords_found,
+        error_message=job.error_message,
+        **reuse_fields(job),
+    )
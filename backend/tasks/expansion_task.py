@@ -1,95 +1,173 @@
+import asyncio
+import json
 import logging
 from datetime import datetime
-from sqlalchemy import select, desc
 
+from backend.config import settings
 from backend.database import async_session
-from backend.models.keyword import Keyword
 from backend.models.collection_job import CollectionJob
-from backend.models.trend_snapshot import TrendSnapshot
 from backend.services.google_trends import fetch_trends_batched
-from backend.services.trending_discovery import fetch_all_trending
+from backend.services.trending_discovery import fetch_all_trending, extract_discovery_seeds
 from backend.services.keyword_expander import run_expansion
+from backend.services.trend_series import store_series
+from backend.services.rising_detector import detect_rising
+from backend.services.snapshot_history import add_snapshots
+from backend.services.refresh_planner import plan_trends_refresh
+from backend.tasks.events import publish_job
+from backend.tasks.job_queue import enqueue_many, job_queue
 
 logger = logging.getLogger(__name__)
 
+# Guards against a discovery run overlapping the next 6-hour tick
+_discovery_lock = asyncio.Lock()
+
 
 async def scheduled_trends_refresh():
-    """Refresh Google Trends data for top keywords. Runs as a scheduled task."""
+    """Refresh Google Trends data for the keywords most overdue for it. Runs daily.
+
+    The refresh planner spends settings.trends_daily_request_budget; usage is
+    recorded on a trends_refresh job row so it shows up on the Jobs page.
+    """
     async with async_session() as db:
-        result = await db.execute(
-            select(Keyword).order_by(desc(Keyword.heat_score)).limit(50)
+        plan = await plan_trends_refresh(db, budget_requests=settings.trends_daily_request_budget)
+        keywords = plan["keywords"]
+
+        now = datetime.utcnow()
+        job = CollectionJob(
+            job_type="trends_refresh",
+            status="running",
+            claimed_by=job_queue.worker_id,
+            started_at=now,
+            heartbeat_at=now,
+            created_at=now,
         )
-        keywords = result.scalars().all()
-        if not keywords:
-            return
+        db.add(job)
+        await db.commit()
 
-        kw_texts = [kw.keyword for kw in keywords]
-        trends_data = await fetch_trends_batched(kw_texts)
+        try:
+            kw_texts = [kw.keyword for kw in keywords]
+            trends_data = await fetch_trends_batched(
+                kw_texts, anchor=settings.trends_anchor_keyword or None,
+            ) if kw_texts else {}
 
-        for kw in keywords:
-            score_key = f"{kw.keyword}_score"
-            if score_key in trends_data.get("interest_over_time", {}):
-                new_score = trends_data["interest_over_time"][score_key]
+            scores = trends_data.get("interest_over_time", {})
+            refreshed_at = datetime.utcnow()
+            snapshots = []
+            for kw in keywords:
+                new_score = scores.get(f"{kw.keyword}_score")
+                if new_score is None:
+                    continue
                 kw.trends_score = new_score
-                snapshot = TrendSnapshot(
-                    keyword_id=kw.id,
-                    trends_score=new_score,
-                    is_rising=kw.is_rising,
-                )
-                db.add(snapshot)
+                kw.trends_refreshed_at = refreshed_at
+                snapshots.append({"keyword_id": kw.id, "trends_score": new_score, "is_rising": kw.is_rising})
+            updated = len(snapshots)
 
-        # Check for newly rising keywords
-        for item in trends_data.get("rising", []):
-            result = await db.execute(
-                select(Keyword).where(Keyword.keyword == item["keyword"])
-            )
-            kw = result.scalar_one_or_none()
-            if kw:
-                kw.is_rising = True
+            await add_snapshots(db, snapshots)
+            await store_series(db, {kw.keyword: kw.id for kw in keywords}, trends_data)
 
-        await db.commit()
-        logger.info(f"Trends refresh complete for {len(kw_texts)} keywords")
+            # is_rising comes from stored series only; flags without a series are cleared
+            rising = await detect_rising(db)
+
+            requests_used = trends_data.get("requests", 0)
+            report = {
+                "keywords_total": plan["total"],
+                "keywords_due": plan["due"],
+                "keywords_planned": len(kw_texts),
+                "keywords_updated": updated,
+                "requests_used": requests_used,
+                "request_budget": plan["budget_requests"],
+                "rising": rising["rising"],
+                "rising_cleared": rising["cleared"],
+                "rising_cleared_no_series": rising["cleared_no_series"],
+            }
+            job.status = "completed"
+            job.target = f"{requests_used}/{plan['budget_requests']} Trends requests"
+            job.params = json.dumps(report)
+            job.keywords_found = updated
+            job.progress = 100
+            job.completed_at = datetime.utcnow()
+            await db.commit()
+            logger.info(f"Trends refresh complete: {report}")
+        except Exception as e:
+            # The job row is ours and heartbeated, so recovery would never fail it for us
+            logger.error(f"Trends refresh failed: {e}")
+            await db.rollback()
+            job.status = "failed"
+            job.error_message = str(e)
+            job.completed_at = datetime.utcnow()
+            await db.commit()
+
+
+async def _expand_trending_term(job_id: int, term: str, slots: asyncio.Semaphore):
+    """Expand one trending term in its own session, giving up after the per-term timeout."""
+    async with slots:
+        async with async_session() as session:
+            try:
+                await asyncio.wait_for(
+                    run_expansion(
+                        session, term,
+                        depth=1,
+                        use_autocomplete=True,
+                        use_trends=False,   # skip to avoid rate limits in bulk
+                        use_serp=False,
+                        existing_job_id=job_id,
+                    ),
+                    timeout=settings.discovery_term_timeout,
+                )
+                return True
+            except asyncio.TimeoutError:
+                reason = f"Timed out after {settings.discovery_term_timeout:.0f}s"
+            except Exception as e:
+                reason = str(e)
+            logger.warning(f"Expansion failed for trending term '{term}': {reason}")
+
+    # An interrupted run may not have recorded its outcome; do it from a fresh session
+    async with async_session() as session:
+        job = await session.get(CollectionJob, job_id)
+        if job.status == "running":
+            job.status = "failed"
+            job.error_message = reason
+            job.completed_at = datetime.utcnow()
+            await session.commit()
+            publish_job(job)
+    return False
 
 
 async def scheduled_trending_discovery():
     """Auto-discover and expand trending topics. Runs every 6 hours."""
+    if _discovery_lock.locked():
+        logger.warning("Trending discovery skipped: previous run still in progress")
+        return
+    async with _discovery_lock:
+        await _run_trending_discovery()
+
+
+async def _run_trending_discovery():
     logger.info("Starting scheduled trending discovery...")
     data = await fetch_all_trending()
 
-    # Collect unique terms across all sources, prioritise Google
-    seen = set()
-    terms = []
-    for source in ("google", "twitter", "reddit"):
-        for item in data.get(source, [])[:8]:
-            term = item["term"].strip()
-            if term and term.lower() not in seen and len(term) > 2:
-                seen.add(term.lower())
-                terms.append(term)
+    async with async_session() as db:
+        terms = await extract_discovery_seeds(db, data)
+        logger.info(f"Trending discovery: found {len(terms)} new seeds to expand")
 
-    terms = terms[:15]  # process top 15 trending terms
-    logger.info(f"Trending discovery: found {len(terms)} unique terms to expand")
+        # Claimed at insert (running, owned by this process) so queue workers
+        # don't also pick them up; params let the queue requeue them if this
+        # process dies mid-run.
+        job_ids = await enqueue_many(
+            db, "expansion", terms,
+            claim=True,
+            depth=1,
+            use_autocomplete=True,
+            use_trends=False,
+            use_serp=False,
+        )
 
-    async with async_session() as db:
-        for term in terms:
-            job = CollectionJob(
-                job_type="expansion",
-                status="pending",
-                seed_keyword=term,
-                created_at=datetime.utcnow(),
-            )
-            db.add(job)
-            await db.commit()
-            await db.refresh(job)
-            try:
-                await run_expansion(
-                    db, term,
-                    depth=1,
-                    use_autocomplete=True,
-                    use_trends=False,   # skip to avoid rate limits in bulk
-                    use_serp=False,
-                    existing_job_id=job.id,
-                )
-            except Exception as e:
-                logger.warning(f"Expansion failed for trending term '{term}': {e}")
+    # Expand concurrently; the shared autocomplete limiter sets the actual pace,
+    # so a slow term no longer holds up the rest.
+    slots = asyncio.Semaphore(settings.discovery_concurrency)
+    results = await asyncio.gather(*(
+        _expand_trending_term(job_id, term, slots)
+        for job_id, term in zip(job_ids, terms)
+    ))
 
-    logger.info(f"Trending discovery complete: expanded {len(terms)} terms")
+    logger.info(f"Trending discovery complete: expanded {sum(results)}/{len(terms)} terms")
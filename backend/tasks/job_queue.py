@@ -0,0 +1,367 @@
+"""
+Job queue on top of the collection_jobs table.
+
+Enqueueing is just inserting a `pending` row (with JSON params). A fixed-size
+pool of worker coroutines claims pending rows most urgent priority first,
+oldest first within a priority, and runs the handler registered for the
+row's job_type under that priority, so its upstream calls are rate limited
+in the same class. A few extra workers only take interactive jobs, so a user
+never waits behind a bulk backfill for a free worker. Claiming is a single UPDATE, so
+any number of processes (web or `python -m backend.worker`) can share the
+table. Each process heartbeats the jobs it runs; jobs whose owner stops
+heartbeating are requeued.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.database import async_session
+from backend.models.collection_job import CollectionJob
+from backend.services.competitor_analyzer import analyze_competitor
+from backend.services.keyword_expander import run_expansion
+from backend.tasks.events import publish_job
+from backend.utils.process import process_id
+from backend.utils.rate_limiter import Priority, priority_scope
+
+logger = logging.getLogger(__name__)
+
+HARD_TIMEOUT_GRACE = 120  # seconds past a job's timeout before it is cancelled outright
+
+
+# ─── Handlers ────────────────────────────────────────────────────────────────
+
+async def _run_expansion_job(db: AsyncSession, job: CollectionJob, params: dict):
+    await run_expansion(
+        db, job.seed_keyword,
+        depth=params.get("depth", 1),
+        use_autocomplete=params.get("use_autocomplete", True),
+        use_trends=params.get("use_trends", True),
+        use_serp=params.get("use_serp", True),
+        force=params.get("force", False),
+        existing_job_id=job.id,
+    )
+
+
+async def _run_competitor_job(db: AsyncSession, job: CollectionJob, params: dict):
+    await analyze_competitor(db, params["competitor_id"], existing_job_id=job.id)
+
+
+HANDLERS = {
+    "expansion": _run_expansion_job,
+    "competitor_crawl": _run_competitor_job,
+}
+
+
+# ─── Enqueue ─────────────────────────────────────────────────────────────────
+
+async def enqueue(
+    db: AsyncSession,
+    job_type: str,
+    seed_keyword: str | None = None,
+    target: str | None = None,
+    priority: Priority = Priority.SCHEDULED,
+    **params,
+) -> CollectionJob:
+    """Insert a pending job and wake up the worker pool."""
+    job = CollectionJob(
+        job_type=job_type,
+        status="pending",
+        seed_keyword=seed_keyword,
+        target=target,
+        priority=int(priority),
+        params=json.dumps(params),
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    job_queue.notify()
+    return job
+
+
+async def enqueue_many(
+    db: AsyncSession,
+    job_type: str,
+    seeds: list[str],
+    claim: bool = False,
+    priority: Priority = Priority.SCHEDULED,
+    **params,
+) -> list[int]:
+    """Insert one job per seed in a single INSERT ... RETURNING id and commit once.
+
+    With claim=True the jobs are inserted already running and owned by this
+    process, for callers that execute them inline instead of via the pool.
+    """
+    if not seeds:
+        return []
+    now = datetime.utcnow()
+    encoded = json.dumps(params)
+    rows = [
+        {
+            "job_type": job_type,
+            "status": "running" if claim else "pending",
+            "seed_keyword": seed,
+            "params": encoded,
+            "priority": int(priority),
+            "attempts": 1 if claim else 0,
+            "claimed_by": job_queue.worker_id if claim else None,
+            "started_at": now if claim else None,
+            "heartbeat_at": now if claim else None,
+            "created_at": now,
+        }
+        for seed in seeds
+    ]
+    result = await db.execute(
+        insert(CollectionJob).returning(CollectionJob.id, sort_by_parameter_order=True),
+        rows,
+    )
+    job_ids = list(result.scalars().all())
+    await db.commit()
+    if not claim:
+        job_queue.notify()
+    return job_ids
+
+
+# ─── Worker pool ─────────────────────────────────────────────────────────────
+
+def _owner_gone(claimed_by: str) -> bool:
+    """Whether a same-host claimant (host:pid or host:pid:boot) is no longer running."""
+    try:
+        pid = int(claimed_by.split(":")[1])
+    except (IndexError, ValueError):
+        return False
+    if pid == os.getpid():
+        return True  # an earlier run of this process; we're a new start
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass  # exists, owned by another user
+    return False
+
+
+class JobQueue:
+    """Bounded pool of workers consuming pending collection_jobs rows."""
+
+    def __init__(
+        self, workers: int, poll_interval: float, heartbeat_interval: float, interactive_workers: int = 0,
+    ):
+        self.workers = workers
+        self.interactive_workers = interactive_workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def worker_id(self) -> str:
+        return process_id()
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def start(self):
+        await self.recover_previous_run()
+        await self.recover()
+        self._tasks = [
+            asyncio.create_task(self._worker(n), name=f"job-worker-{n}")
+            for n in range(self.workers + self.interactive_workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat(), name="job-heartbeat"))
+        logger.info(
+            f"Job queue started with {self.workers} workers + {self.interactive_workers} "
+            f"interactive-only ({self.worker_id})"
+        )
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Job queue stopped")
+
+    async def recover(self):
+        """Requeue jobs whose owner stopped heartbeating; give up on ones that keep dying."""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.heartbeat_interval * 4)
+        last_seen = func.coalesce(
+            CollectionJob.heartbeat_at, CollectionJob.started_at, CollectionJob.created_at
+        )
+        await self._requeue(last_seen < stale_before)
+
+    async def recover_previous_run(self):
+        """Requeue jobs left running on this host by processes that are gone.
+
+        A restarted container usually comes back with the same host:pid, so
+        without this its predecessor's jobs would wait out the stale-heartbeat
+        window. Ids with our pid are an earlier run of this process; other pids
+        are only taken over if no such process exists, since sibling processes
+        (e.g. a second worker) share the host.
+        """
+        await self._requeue(
+            CollectionJob.claimed_by.startswith(f"{socket.gethostname()}:", autoescape=True),
+            CollectionJob.claimed_by != self.worker_id,
+            owner_gone=_owner_gone,
+        )
+
+    async def _requeue(self, *conditions, owner_gone=None):
+        async with async_session() as db:
+            result = await db.execute(
+                select(CollectionJob).where(CollectionJob.status == "running", *conditions)
+            )
+            interrupted = result.scalars().all()
+            if owner_gone:
+                interrupted = [job for job in interrupted if owner_gone(job.claimed_by)]
+            for job in interrupted:
+                if job.job_type not in HANDLERS:
+                    # e.g. scheduled trends_refresh runs; the next tick redoes them
+                    job.status = "failed"
+                    job.error_message = "Interrupted"
+                    job.completed_at = datetime.utcnow()
+                elif (job.attempts or 0) >= settings.job_max_attempts:
+                    job.status = "failed"
+                    job.error_message = f"Interrupted {job.attempts} times, giving up"
+                    job.completed_at = datetime.utcnow()
+                else:
+                    job.status = "pending"
+                    job.progress = 0
+                    job.claimed_by = None
+            await db.commit()
+        if interrupted:
+            logger.info(f"Job queue: recovered {len(interrupted)} interrupted jobs")
+            self.notify()
+
+    async def _claim(self, interactive_only: bool = False) -> int | None:
+        """Atomically mark the most urgent, oldest pending job as ours and return its id."""
+        next_pending = select(CollectionJob.id).where(CollectionJob.status == "pending")
+        if interactive_only:
+            next_pending = next_pending.where(CollectionJob.priority == Priority.INTERACTIVE)
+        next_pending = (
+            next_pending
+            .order_by(CollectionJob.priority, CollectionJob.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        now = datetime.utcnow()
+        async with async_session() as db:
+            # One statement: safe against other workers and other processes
+            result = await db.execute(
+                update(CollectionJob)
+                .where(CollectionJob.id == next_pending, CollectionJob.status == "pending")
+                .values(
+                    status="running",
+                    claimed_by=self.worker_id,
+                    started_at=now,
+                    heartbeat_at=now,
+                    attempts=CollectionJob.attempts + 1,
+                )
+                .returning(CollectionJob.id)
+            )
+            job_id = result.scalar()
+            await db.commit()
+            return job_id
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                async with async_session() as db:
+                    await db.execute(
+                        update(CollectionJob)
+                        .where(
+                            CollectionJob.status == "running",
+                            CollectionJob.claimed_by == self.worker_id,
+                        )
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    await db.commit()
+                await self.recover()
+            except Exception as e:
+                logger.warning(f"Job queue heartbeat failed: {e}")
+
+    async def _worker(self, n: int):
+        interactive_only = n >= self.workers
+        while True:
+            self._wakeup.clear()
+            try:
+                job_id = await self._claim(interactive_only)
+            except Exception as e:
+                logger.error(f"Job worker {n}: claim failed: {e}")
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                # _run records handler failures itself; this is the job row or the
+                # failure path being unusable. Keep the worker alive either way.
+                logger.exception(f"Job worker {n}: job {job_id} crashed outside its handler: {e}")
+                await self._mark_failed(job_id, f"Worker error: {e}")
+
+    async def _mark_failed(self, job_id: int, error: str):
+        """Best-effort: fail a job we claimed; recover() requeues it if even this doesn't stick."""
+        try:
+            async with async_session() as db:
+                job = await db.get(CollectionJob, job_id)
+                if job is None or job.status != "running" or job.claimed_by != self.worker_id:
+                    return
+                job.status = "failed"
+                job.error_message = error
+                job.completed_at = datetime.utcnow()
+                await db.commit()
+                publish_job(job)
+        except Exception as e:
+            logger.error(f"Job {job_id}: could not mark failed: {e}")
+
+    async def _run(self, job_id: int):
+        async with async_session() as db:
+            job = await db.get(CollectionJob, job_id)
+            if job is None:
+                logger.warning(f"Job {job_id} disappeared after it was claimed")
+                return
+            handler = HANDLERS.get(job.job_type)
+            # Handlers stop themselves at their checkpoints once the timeout passes;
+            # the hard limit only catches a job stuck inside a single upstream call.
+            timeout = settings.job_timeouts.get(job.job_type)
+            hard_timeout = timeout + HARD_TIMEOUT_GRACE if timeout else None
+            priority = job.priority if job.priority is not None else Priority.SCHEDULED
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for job type '{job.job_type}'")
+                with priority_scope(priority):
+                    await asyncio.wait_for(
+                        handler(db, job, json.loads(job.params or "{}")),
+                        timeout=hard_timeout,
+                    )
+            except Exception as e:
+                # Handlers record their own failures; this catches setup errors and hard timeouts
+                if isinstance(e, asyncio.TimeoutError):
+                    error = f"Timed out after {timeout:.0f}s without reaching a checkpoint"
+                else:
+                    error = str(e)
+                logger.error(f"Job {job_id} ({job.job_type}) failed: {error}")
+                await db.rollback()
+                job.status = "failed"
+                job.error_message = error
+                job.completed_at = datetime.utcnow()
+                await db.commit()
+                await db.refresh(job)
+                publish_job(job)
+
+
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    poll_interval=settings.job_poll_interval,
+    heartbeat_interval=settings.job_heartbeat_interval,
+    interactive_workers=settings.job_interactive_workers,
+)
@@ -0,0 +1,97 @@
+"""
+Lease-based leader election on the leader_leases table.
+
+A process is leader while it holds an unexpired lease row. The leader renews
+the lease every ttl/3 seconds; if it dies, the lease expires and the next
+process to try takes it over.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.database import async_session
+from backend.models.leader_lease import LeaderLease
+from backend.utils.process import process_id
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Holds (or keeps trying to take) a named lease."""
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.is_leader = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def holder_id(self) -> str:
+        return process_id()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name=f"leader-{self.name}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            await self._release()
+
+    async def _run(self):
+        while True:
+            try:
+                leader = await self._try_acquire()
+            except Exception as e:
+                # Can't confirm the lease; stop acting as leader until we can
+                logger.warning(f"Leader lease '{self.name}' renewal failed: {e}")
+                leader = False
+            if leader != self.is_leader:
+                logger.info(
+                    f"{self.holder_id} {'acquired' if leader else 'lost'} leader lease '{self.name}'"
+                )
+            self.is_leader = leader
+            await asyncio.sleep(self.ttl / 3)
+
+    async def _try_acquire(self) -> bool:
+        """Take the lease if free or expired, or renew it if already ours."""
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=self.ttl)
+        async with async_session() as db:
+            await db.execute(
+                insert(LeaderLease)
+                .values(name=self.name, holder=self.holder_id, acquired_at=now, expires_at=expires)
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            result = await db.execute(
+                update(LeaderLease)
+                .where(
+                    LeaderLease.name == self.name,
+                    or_(LeaderLease.holder == self.holder_id, LeaderLease.expires_at < now),
+                )
+                .values(
+                    holder=self.holder_id,
+                    expires_at=expires,
+                    acquired_at=now if not self.is_leader else LeaderLease.acquired_at,
+                )
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def _release(self):
+        """Expire our lease immediately so another process can take over."""
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    update(LeaderLease)
+                    .where(LeaderLease.name == self.name, LeaderLease.holder == self.holder_id)
+                    .values(expires_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Leader lease '{self.name}' release failed: {e}")
+        self.is_leader = False
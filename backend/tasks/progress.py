@@ -0,0 +1,99 @@
+import logging
+import time
+from sqlalchemy import select, update
+
+from backend.database import async_session
+from backend.models.collection_job import CollectionJob
+from backend.tasks.events import job_events
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Tracks a job's progress in memory and persists it at a throttled rate.
+
+    Progress writes go through their own short-lived session so they never
+    commit (or wait on) the caller's data transaction. It also serves the
+    job's cooperative checkpoints via should_stop().
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        min_interval: float = 1.0,
+        min_delta: float = 5.0,
+        timeout: float | None = None,
+    ):
+        """
+        Args:
+            job_id: collection_jobs row to report on
+            min_interval: persist at most this often (seconds)...
+            min_delta: ...unless progress moved by at least this many points
+            timeout: wall-clock budget in seconds, after which should_stop() says so
+        """
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.timeout = timeout
+        self.progress = 0.0
+        self.stop_reason: str | None = None
+        self._persisted = 0.0
+        self._last_write = 0.0
+        self._last_cancel_check = 0.0
+        self._deadline = time.monotonic() + timeout if timeout else None
+
+    async def update(self, progress: float):
+        """Record new progress; only hits the database when the throttle allows."""
+        self.progress = progress
+        job_events.publish(self.job_id, progress=progress)
+        elapsed = time.monotonic() - self._last_write
+        if progress != self._persisted and (
+            elapsed >= self.min_interval or abs(progress - self._persisted) >= self.min_delta
+        ):
+            await self.flush()
+
+    async def flush(self):
+        """Write the current in-memory progress in a separate transaction."""
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    update(CollectionJob)
+                    .where(CollectionJob.id == self.job_id)
+                    .values(progress=self.progress)
+                )
+                await session.commit()
+        except Exception as e:
+            # Progress is advisory — never fail the job because of it
+            logger.warning(f"Progress update failed for job {self.job_id}: {e}")
+            return
+        self._persisted = self.progress
+        self._last_write = time.monotonic()
+
+    async def should_stop(self) -> str | None:
+        """Cooperative checkpoint: 'cancelled' or 'timeout' once the job should wind down.
+
+        The cancel flag is read from the DB at most once per min_interval, so
+        calling this in a tight loop is cheap.
+        """
+        if self.stop_reason:
+            return self.stop_reason
+        now = time.monotonic()
+        if self._deadline is not None and now >= self._deadline:
+            self.stop_reason = "timeout"
+        elif now - self._last_cancel_check >= self.min_interval:
+            self._last_cancel_check = now
+            try:
+                async with async_session() as session:
+                    cancel = (await session.execute(
+                        select(CollectionJob.cancel_requested).where(CollectionJob.id == self.job_id)
+                    )).scalar()
+                if cancel:
+                    self.stop_reason = "cancelled"
+            except Exception as e:
+                logger.warning(f"Cancel check failed for job {self.job_id}: {e}")
+        return self.stop_reason
+
+    def stop_message(self) -> str:
+        if self.stop_reason == "timeout":
+            return f"Timed out after {self.timeout:.0f}s"
+        return "Cancelled by user"
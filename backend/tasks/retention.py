@@ -0,0 +1,92 @@
+"""
+Retention tasks.
+
+Finished jobs older than settings.job_retention_days are copied into
+collection_jobs_archive and deleted from collection_jobs, in small batches so
+the write lock is never held for long. Expired Trends cache rows are deleted,
+and old trend snapshots are downsampled (see services/snapshot_history.py).
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.config import settings
+from backend.database import async_session
+from backend.models.collection_job import CollectionJob, CollectionJobArchive
+from backend.services import trends_cache
+from backend.services.snapshot_history import compact_snapshots
+from backend.tasks.events import FINISHED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+async def archive_finished_jobs(retention_days: int) -> int:
+    """Move finished jobs created before the cutoff to the archive table."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    columns = [c.name for c in CollectionJob.__table__.columns]
+    archived = 0
+
+    while True:
+        async with async_session() as db:
+            ids = (await db.execute(
+                select(CollectionJob.id)
+                .where(
+                    CollectionJob.status.in_(FINISHED_STATUSES),
+                    CollectionJob.created_at < cutoff,
+                )
+                .limit(ARCHIVE_BATCH_SIZE)
+            )).scalars().all()
+            if not ids:
+                break
+
+            await db.execute(
+                insert(CollectionJobArchive)
+                .from_select(
+                    columns,
+                    select(*[CollectionJob.__table__.c[name] for name in columns])
+                    .where(CollectionJob.id.in_(ids)),
+                )
+                .on_conflict_do_nothing(index_elements=["id"])
+            )
+            await db.execute(delete(CollectionJob).where(CollectionJob.id.in_(ids)))
+            await db.commit()
+        archived += len(ids)
+        if len(ids) < ARCHIVE_BATCH_SIZE:
+            break
+
+    return archived
+
+
+async def scheduled_job_retention():
+    """Scheduled task: archive old finished jobs."""
+    try:
+        archived = await archive_finished_jobs(settings.job_retention_days)
+        logger.info(
+            f"Job retention: archived {archived} jobs older than {settings.job_retention_days} days"
+        )
+    except Exception as e:
+        logger.error(f"Job retention failed: {e}")
+
+
+async def scheduled_trends_cache_purge():
+    """Scheduled task: drop expired Trends cache rows."""
+    try:
+        removed = await trends_cache.purge_expired()
+        logger.info(f"Trends cache purge: removed {removed} expired rows")
+    except Exception as e:
+        logger.error(f"Trends cache purge failed: {e}")
+
+
+async def scheduled_snapshot_compaction():
+    """Scheduled task: downsample old trend snapshots to weekly/monthly averages."""
+    try:
+        async with async_session() as db:
+            result = await compact_snapshots(
+                db, raw_days=settings.snapshot_raw_days, weekly_days=settings.snapshot_weekly_days,
+            )
+        logger.info(f"Snapshot compaction: {result}")
+    except Exception as e:
+        logger.error(f"Snapshot compaction failed: {e}")
@@ -1,17 +1,43 @@
+import functools
 import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from backend.config import settings
 from backend.tasks.expansion_task import scheduled_trends_refresh, scheduled_trending_discovery
+from backend.tasks.leader import LeaderLock
+from backend.utils.rate_limiter import Priority, priority_scope
+from backend.tasks.retention import (
+    scheduled_job_retention, scheduled_trends_cache_purge, scheduled_snapshot_compaction,
+)
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+# Every web/worker process runs the scheduler, but only the lease holder acts
+scheduler_lock = LeaderLock("scheduler", ttl=settings.leader_lease_ttl)
 
-def setup_scheduler():
+
+def leader_only(func):
+    """Skip a scheduled run unless this process currently holds the scheduler lease.
+
+    Runs that go ahead make their upstream calls at scheduled priority.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not scheduler_lock.is_leader:
+            logger.info(f"Skipping {func.__name__}: not the scheduler leader")
+            return
+        with priority_scope(Priority.SCHEDULED):
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+async def setup_scheduler():
     """Configure and start the background scheduler."""
+    scheduler_lock.start()
     # Refresh trends for top keywords daily at 3 AM
     scheduler.add_job(
-        scheduled_trends_refresh,
+        leader_only(scheduled_trends_refresh),
         "cron",
         hour=3,
         minute=0,
@@ -20,17 +46,44 @@ def setup_scheduler():
     )
     # Auto-discover trending topics every 6 hours
     scheduler.add_job(
-        scheduled_trending_discovery,
+        leader_only(scheduled_trending_discovery),
         "interval",
         hours=6,
         id="trending_discovery",
         replace_existing=True,
     )
+    # Archive old finished jobs daily, after the trends refresh
+    scheduler.add_job(
+        leader_only(scheduled_job_retention),
+        "cron",
+        hour=4,
+        minute=30,
+        id="job_retention",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        leader_only(scheduled_trends_cache_purge),
+        "cron",
+        hour=4,
+        minute=45,
+        id="trends_cache_purge",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        leader_only(scheduled_snapshot_compaction),
+        "cron",
+        day_of_week="sun",
+        hour=5,
+        minute=0,
+        id="snapshot_compaction",
+        replace_existing=True,
+    )
     scheduler.start()
-    logger.info("Scheduler started: daily trends refresh + 6-hour trending discovery")
+    logger.info("Scheduler started: daily trends refresh + 6-hour trending discovery + retention")
 
 
-def shutdown_scheduler():
+async def shutdown_scheduler():
     if scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("Scheduler shut down")
+    await scheduler_lock.stop()
@@ -0,0 +1,20 @@
+"""
+Identity of this process in shared tables (job claims, leader leases).
+
+host:pid alone is reused across restarts: a restarted container gets the same
+hostname and usually the same pid, and would take over the dead process's
+claims as its own. A random suffix per process start keeps ids unique.
+"""
+import os
+import socket
+import uuid
+
+_ids: dict[int, str] = {}
+
+
+def process_id() -> str:
+    """host:pid:boot, unique to this process start (recomputed after a fork)."""
+    pid = os.getpid()
+    if pid not in _ids:
+        _ids[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _ids[pid]
@@ -1,39 +1,401 @@
 import asyncio
+import logging
 import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from sqlalchemy import update, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.config import settings
+from backend.database import async_session
+from backend.models.rate_limit_bucket import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Request classes, most urgent first."""
+    INTERACTIVE = 0  # a user is waiting on the result
+    SCHEDULED = 1  # periodic jobs: trends refresh, trending discovery
+    BACKFILL = 2  # bulk reseeds and other catch-up work
+
+
+# Priority of upstream calls made from the current task; job runners and the
+# scheduler set it, anything else (API requests) counts as interactive
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def priority_scope(priority: int):
+    """Run the enclosed upstream calls (and tasks started inside) at the given priority."""
+    token = request_priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
 
 
 class TokenBucketLimiter:
-    """Simple token bucket rate limiter for async operations."""
+    """
+    Token bucket rate limiter for async operations, with priority classes.
+
+    Callers that find a token and nobody queued take it straight away.
+    Everyone else joins a FIFO queue for their priority. A single dispatcher
+    task reserves the next token (the bucket goes negative), sleeps until it
+    has refilled, then hands it to the head of the most urgent non-empty
+    queue. Nothing holds a lock while sleeping, so a waiter that arrives
+    during a sleep can still be served first if it outranks the others.
+    """
 
-    def __init__(self, rate: float, capacity: int = None):
+    def __init__(self, rate: float, capacity: int = None, name: str = ""):
         """
         Args:
             rate: tokens per second
             capacity: max burst capacity (defaults to rate)
+            name: upstream name, used for logging and shared bucket rows
         """
+        self.name = name
         self.rate = rate
+        self.target_rate = rate  # configured rate; throttling lowers self.rate below it
         self.capacity = capacity or int(rate)
         self.tokens = self.capacity
         self.last_refill = time.monotonic()
-        self._lock = asyncio.Lock()
+        self._waiters: dict[Priority, deque] = {p: deque() for p in Priority}
+        self._dispatcher: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()  # set when the rate changes under a sleeping dispatcher
+        self._metrics = {p: {"acquired": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0} for p in Priority}
 
-    async def acquire(self):
-        async with self._lock:
-            now = time.monotonic()
-            elapsed = now - self.last_refill
-            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+    def _refill(self):
+        # last_refill is in the future while paused; nothing refills until then
+        now = time.monotonic()
+        if now > self.last_refill:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
             self.last_refill = now
 
-            if self.tokens < 1:
-                wait_time = (1 - self.tokens) / self.rate
-                await asyncio.sleep(wait_time)
-                self.tokens = 0
-            else:
-                self.tokens -= 1
+    def _record(self, priority: Priority, wait: float):
+        m = self._metrics[priority]
+        m["acquired"] += 1
+        if wait > 0:
+            m["waited"] += 1
+            m["wait_total"] += wait
+            m["wait_max"] = max(m["wait_max"], wait)
+
+    def queue_depth(self, priority: Priority) -> int:
+        return sum(1 for _, future in self._waiters[priority] if not future.done())
+
+    def _take_now(self) -> bool:
+        """Fast path: take a token if one is free and nobody is queued."""
+        self._refill()
+        if self.tokens >= 1 and not any(self._waiters.values()):
+            self.tokens -= 1
+            return True
+        return False
+
+    async def _reserve(self) -> float:
+        """Take the next token, going into debt if needed; returns seconds until it is ours."""
+        self._refill()
+        self.tokens -= 1
+        return self._remaining()
+
+    def _remaining(self) -> float:
+        """Seconds until the bucket is out of debt, i.e. the last reserved token is ready."""
+        self._refill()
+        return self.paused_for() + max(0.0, -self.tokens / self.rate)
+
+    async def _refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def paused_for(self) -> float:
+        return max(0.0, self.last_refill - time.monotonic())
+
+    async def set_rate(self, rate: float):
+        self._refill()
+        self.rate = rate
+        self._wakeup.set()
+
+    async def throttle(self, rate: float, pause: float):
+        """Drop to `rate` and hand out nothing for `pause` seconds."""
+        self._refill()
+        self.rate = rate
+        self.tokens = min(self.tokens, 0.0)
+        self.last_refill = max(self.last_refill, time.monotonic() + pause)
+        self._wakeup.set()
+
+    async def reconfigure(self, rate: float | None = None, capacity: int | None = None):
+        """Change the configured rate (tokens per second) and/or burst capacity; applies immediately."""
+        self._refill()
+        if rate is not None:
+            self.rate = self.target_rate = rate
+        if capacity is not None:
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+        self._wakeup.set()
+
+    async def acquire(self, priority: int | None = None):
+        """Wait for a token; priority defaults to the current request_priority."""
+        priority = request_priority.get() if priority is None else Priority(priority)
+        if self._take_now():
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append((time.monotonic(), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        # A cancelled caller cancels its future; the dispatcher skips it
+        await future
+
+    def _next_priority(self) -> Priority | None:
+        for priority, queue in self._waiters.items():
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue:
+                return priority
+        return None
+
+    async def _dispatch(self):
+        while self._next_priority() is not None:
+            wait = await self._reserve()
+            while wait > 0:
+                # Sleep off the reservation, re-timing it if the rate changes meanwhile
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    break
+                wait = self._remaining()
+            # Pick after the sleep: a more urgent waiter may have arrived
+            priority = self._next_priority()
+            if priority is None:
+                # Everyone waiting gave up
+                await self._refund()
+                return
+            queued_at, future = self._waiters[priority].popleft()
+            future.set_result(None)
+            self._record(priority, time.monotonic() - queued_at)
+
+    async def live_stats(self) -> dict:
+        """Current stats; shared limiters override this to read the shared bucket."""
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Token level, queue depth and wait times per priority class (queues are this process's)."""
+        self._refill()
+        classes = {}
+        for priority, m in self._metrics.items():
+            classes[priority.name.lower()] = {
+                "queued": self.queue_depth(priority),
+                "acquired": m["acquired"],
+                "waited": m["waited"],
+                "avg_wait": round(m["wait_total"] / m["waited"], 3) if m["waited"] else 0.0,
+                "max_wait": round(m["wait_max"], 3),
+            }
+        return {
+            "backend": "memory",
+            "rate_per_minute": round(self.rate * 60, 2),
+            "target_rate_per_minute": round(self.target_rate * 60, 2),
+            "capacity": self.capacity,
+            "paused_for": round(self.paused_for(), 1),
+            "tokens": round(self.tokens, 2),
+            "classes": classes,
+        }
+
+
+def _is_lock_error(error: OperationalError) -> bool:
+    """SQLite's "database is locked" / "database is busy": another connection holds the write lock."""
+    message = str(error.orig or error).lower()
+    return "locked" in message or "busy" in message
+
+
+class SharedTokenBucketLimiter(TokenBucketLimiter):
+    """
+    Token bucket whose state lives in the rate_limit_buckets table, so every
+    process on the database draws from the same budget.
+
+    Each reservation is one atomic UPDATE ... RETURNING that refills the
+    bucket from the stored rate and takes a token, letting it go negative;
+    the caller sleeps off the debt. Priority queueing within the process
+    works as in the in-memory limiter. A locked database is waited out, since
+    another process holding the write lock is routine; only if the table
+    can't be used at all does the process fall back to its local bucket.
+    """
+
+    def __init__(self, rate: float, capacity: int = None, name: str = ""):
+        super().__init__(rate, capacity, name)
+        self._registered = False
+
+    def _take_now(self) -> bool:
+        return False
+
+    async def _register(self, db):
+        """Create the bucket row, or reset its configuration to this process's.
+
+        A lower rate already in the row (another process is backing off) is
+        kept; success reports raise it back to the configured rate.
+        """
+        stmt = insert(RateLimitBucket).values(
+            name=self.name, tokens=self.capacity, rate=self.rate, target_rate=self.target_rate,
+            capacity=self.capacity, updated_at=time.time(),
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                "rate": func.min(RateLimitBucket.rate, stmt.excluded.rate),
+                "target_rate": stmt.excluded.target_rate,
+                "capacity": self.capacity,
+            },
+        ))
+        self._registered = True
+
+    async def _with_lock_retry(self, operation):
+        """Run a shared-bucket operation, waiting out other processes' write locks."""
+        delay = 0.05
+        while True:
+            try:
+                return await operation()
+            except OperationalError as e:
+                if not _is_lock_error(e):
+                    raise
+                # Another process is writing; its transactions are short
+                logger.debug(f"Shared rate limit '{self.name}' locked, retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+
+    async def _reserve(self) -> float:
+        try:
+            tokens, updated_at = await self._with_lock_retry(self._reserve_shared)
+        except Exception as e:
+            logger.warning(f"Shared rate limit '{self.name}' unavailable, using local bucket: {e}")
+            self._registered = False
+            return await super()._reserve()
+        # Local copy is only for stats() and the fallback
+        self.tokens = tokens
+        self.last_refill = time.monotonic() + (updated_at - time.time())
+        return self.paused_for() + max(0.0, -tokens / self.rate)
+
+    async def _reserve_shared(self) -> tuple[float, float]:
+        now = time.time()
+        bucket = RateLimitBucket
+        async with async_session() as db:
+            if not self._registered:
+                await self._register(db)
+            refilled = bucket.tokens + func.max(0.0, now - bucket.updated_at) * bucket.rate
+            result = await db.execute(
+                update(bucket)
+                .where(bucket.name == self.name)
+                .values(
+                    tokens=func.min(bucket.capacity, refilled) - 1,
+                    updated_at=func.max(bucket.updated_at, now),
+                )
+                .returning(
+                    bucket.tokens, bucket.rate, func.coalesce(bucket.target_rate, bucket.rate),
+                    bucket.capacity, bucket.updated_at,
+                )
+            )
+            tokens, self.rate, self.target_rate, self.capacity, updated_at = result.one()
+            await db.commit()
+        return tokens, updated_at
+
+    async def _update_bucket(self, **values):
+        async def update_row():
+            async with async_session() as db:
+                if not self._registered:
+                    await self._register(db)  # a PUT before any reservation must still reach the row
+                await db.execute(
+                    update(RateLimitBucket).where(RateLimitBucket.name == self.name).values(**values)
+                )
+                await db.commit()
+
+        try:
+            await self._with_lock_retry(update_row)
+        except Exception as e:
+            logger.warning(f"Shared rate limit '{self.name}' update failed: {e}")
+            self._registered = False
+
+    async def set_rate(self, rate: float):
+        await super().set_rate(rate)
+        await self._update_bucket(rate=rate)
+
+    async def reconfigure(self, rate: float | None = None, capacity: int | None = None):
+        """Reconfigure the shared bucket; other processes pick it up on their next reservation."""
+        await super().reconfigure(rate, capacity)
+        values = {"capacity": self.capacity, "tokens": func.min(RateLimitBucket.tokens, self.capacity)}
+        if rate is not None:
+            values.update(rate=rate, target_rate=rate)
+        await self._update_bucket(**values)
+
+    async def throttle(self, rate: float, pause: float):
+        """Pause and slow down every process sharing the bucket."""
+        await super().throttle(rate, pause)
+        await self._update_bucket(
+            rate=rate,
+            tokens=func.min(RateLimitBucket.tokens, 0.0),
+            updated_at=func.max(RateLimitBucket.updated_at, time.time() + pause),
+        )
+
+    async def _refund(self):
+        await self._update_bucket(tokens=func.min(RateLimitBucket.capacity, RateLimitBucket.tokens + 1))
+
+    def stats(self) -> dict:
+        return {**super().stats(), "backend": "sqlite"}
+
+    async def live_stats(self) -> dict:
+        """stats() with rate, tokens and pause read from the shared row rather than this process's copy."""
+        stats = self.stats()
+        try:
+            async with async_session() as db:
+                bucket = await db.get(RateLimitBucket, self.name)
+        except Exception as e:
+            logger.warning(f"Shared rate limit '{self.name}' read failed: {e}")
+            return {**stats, "shared": False}
+        if bucket is None:
+            return {**stats, "shared": False}  # nothing reserved through the shared bucket yet
+        now = time.time()
+        tokens = bucket.tokens
+        if now > bucket.updated_at:
+            tokens = min(bucket.capacity, tokens + (now - bucket.updated_at) * bucket.rate)
+        target = bucket.target_rate or bucket.rate
+        return {
+            **stats,
+            "shared": True,
+            "rate_per_minute": round(bucket.rate * 60, 2),
+            "target_rate_per_minute": round(target * 60, 2),
+            "capacity": int(bucket.capacity),
+            "paused_for": round(max(0.0, bucket.updated_at - now), 1),
+            "tokens": round(tokens, 2),
+        }
+
+
+def rate_limit_backend() -> str:
+    """settings.rate_limit_backend, or the default for this deployment when unset."""
+    if settings.rate_limit_backend:
+        return settings.rate_limit_backend
+    return "memory" if settings.run_background_jobs else "sqlite"
+
+
+def make_limiter(name: str, rate: float, capacity: int) -> TokenBucketLimiter:
+    """Build a limiter on the backend chosen by settings.rate_limit_backend."""
+    if rate_limit_backend() == "sqlite":
+        return SharedTokenBucketLimiter(rate, capacity, name=name)
+    return TokenBucketLimiter(rate, capacity, name=name)
+
 
+# Limiters per upstream, from the *_requests_per_minute and *_burst settings
+autocomplete_limiter = make_limiter(
+    "autocomplete", settings.autocomplete_requests_per_minute / 60, settings.autocomplete_burst,
+)
+trends_limiter = make_limiter("trends", settings.trends_requests_per_minute / 60, settings.trends_burst)
+serp_limiter = make_limiter("serp", settings.serp_requests_per_minute / 60, settings.serp_burst)
+competitor_limiter = make_limiter(
+    "competitor", settings.competitor_requests_per_minute / 60, settings.competitor_burst,
+)
 
-# Pre-configured limiters
-autocomplete_limiter = TokenBucketLimiter(rate=0.5, capacity=3)  # 30/min
-trends_limiter = TokenBucketLimiter(rate=0.17, capacity=2)  # ~10/min
-serp_limiter = TokenBucketLimiter(rate=0.17, capacity=2)
-competitor_limiter = TokenBucketLimiter(rate=0.08, capacity=1)  # ~5/min
+LIMITERS = {
+    "autocomplete": autocomplete_limiter,
+    "trends": trends_limiter,
+    "serp": serp_limiter,
+    "competitor": competitor_limiter,
+}
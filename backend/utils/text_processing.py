@@ -53,3 +53,93 @@ STOP_WORDS = {
 def filter_stopwords(keywords: list[str]) -> list[str]:
     """Remove keywords that are just stop words."""
     return [kw for kw in keywords if not all(w in STOP_WORDS for w in kw.split())]
+
+
+# ─── Keyphrase extraction ─────────────────────────────────────────────────────
+# Trending items are headlines, post titles and hashtags, not search queries.
+# These helpers cut them down to a few short phrases that autocomplete can
+# actually complete.
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_BRACKETS_RE = re.compile(r'[\(\[\{][^\)\]\}]*[\)\]\}]')
+_HASHTAG_RE = re.compile(r'#(\w+)')
+_CAMEL_PART_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+_PHRASE_BREAK_RE = re.compile(r"[^\w\s'\-]+|\s-\s")
+
+# Headline filler that never makes a useful seed on its own, on top of STOP_WORDS
+HEADLINE_FILLER = {
+    'says', 'said', 'til', 'breaking', 'update', 'new', 'now', 'today', 'tonight',
+    'next', 'last', 'week', 'month', 'year', 'years', 'day', 'days', 'get', 'got',
+    'make', 'making', 'made', 'one', 'first', 'ever', 'really', 'still', 'like',
+    'issued', 'finally', 'officially', 'reportedly', 'anyone', 'someone', 'thing',
+}
+
+
+def split_hashtag(tag: str) -> str:
+    """'#WorldSeriesGame7' -> 'world series game 7'. Tags that don't look
+    camel-cased (e.g. 'iPhone', 'McDonalds', 'nfldraft') are only lowercased."""
+    tag = tag.lstrip('#')
+    parts = []
+    for chunk in tag.split('_'):
+        parts.extend(_CAMEL_PART_RE.findall(chunk))
+    if '_' not in tag and sum(1 for p in parts if len(p) >= 3 and not p.isdigit()) < 2:
+        return tag.lower()
+    return ' '.join(p.lower() for p in parts)
+
+
+def extract_keyphrases(text: str, max_phrases: int = 3, max_words: int = 3) -> list[str]:
+    """
+    Pick up to max_phrases short candidate phrases (1 to max_words words)
+    from a headline, title or hashtag.
+
+    Stopwords and punctuation split the text into runs of content words;
+    each run contributes its best window of at most max_words words, scored
+    by word length with a bonus for capitalized words (names, products)
+    inside the text. Short queries come back as they are.
+    """
+    text = _URL_RE.sub(' ', text)
+    text = _BRACKETS_RE.sub(' ', text)
+    if len(text.split()) == 1:
+        # A lone hashtag or term is one concept; keep it whole
+        phrase = clean_keyword(split_hashtag(text.strip()))
+        return [phrase] if len(phrase) > 2 and not phrase.isdigit() else []
+    text = _HASHTAG_RE.sub(lambda m: f" {split_hashtag(m.group(1))} ", text)
+
+    candidates = []
+    first = True
+    for fragment in _PHRASE_BREAK_RE.split(text):
+        raws = fragment.split()
+        run: list[tuple[str, float]] = []
+        for i, raw in enumerate(raws + [None]):
+            word = clean_keyword(raw).removesuffix("'s").strip("-'") if raw else ''
+            if word and word not in STOP_WORDS and word not in HEADLINE_FILLER and len(word) > 1:
+                # Capitalized words inside the text are names and products; the
+                # first word counts only when the next one is capitalized too
+                capitalized = raw[0].isupper() and (
+                    not first or (i + 1 < len(raws) and raws[i + 1][:1].isupper())
+                )
+                run.append((word, 1.0 + min(len(word), 10) / 10 + (1.0 if capitalized else 0.0)))
+            elif run:
+                candidates.append(_best_window(run, max_words))
+                run = []
+            if raw:
+                first = False
+
+    seen = set()
+    phrases = []
+    for score, phrase in sorted(candidates, reverse=True):
+        words = phrase.split()
+        if phrase in seen or (len(words) == 1 and (len(phrase) < 4 or phrase.isdigit())):
+            continue
+        seen.add(phrase)
+        phrases.append(phrase)
+        if len(phrases) == max_phrases:
+            break
+    return phrases
+
+
+def _best_window(run: list[tuple[str, float]], max_words: int) -> tuple[float, str]:
+    size = min(len(run), max_words)
+    best = max(range(len(run) - size + 1), key=lambda i: sum(s for _, s in run[i:i + size]))
+    window = run[best:best + size]
+    return sum(s for _, s in window), ' '.join(w for w, _ in window)
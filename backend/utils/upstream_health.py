@@ -0,0 +1,145 @@
+"""
+Per-upstream health tracking: AIMD rate control plus a circuit breaker.
+
+Callers report each upstream response as ok, empty, throttled or error.
+Throttling (HTTP 429/503, Google's CAPTCHA "sorry" page, or a long streak of
+empty results) halves the upstream's limiter rate and opens the breaker: the
+limiter hands out no tokens for a cooldown, so queued jobs pause instead of
+burning calls on an upstream that is blocking us. The cooldown doubles each
+time the breaker trips again before the upstream has recovered. Every
+successful response adds back a small fraction of the configured rate.
+"""
+import logging
+import time
+
+import httpx
+
+from backend.utils.rate_limiter import (
+    TokenBucketLimiter, autocomplete_limiter, trends_limiter, serp_limiter, competitor_limiter,
+)
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = {429, 503}
+# Google answers blocked clients with a redirect to /sorry/ or an interstitial page
+CAPTCHA_MARKERS = ("/sorry/", "unusual traffic from your computer", "g-recaptcha")
+
+
+def throttle_signal(resp: httpx.Response, captcha: bool = True) -> str | None:
+    """Why a response looks like throttling, or None. captcha=False for non-Google sites."""
+    if resp.status_code in THROTTLE_STATUSES:
+        return f"HTTP {resp.status_code}"
+    if captcha:
+        location = resp.headers.get("location", "")
+        if "/sorry/" in location or "/sorry/" in str(resp.url):
+            return "CAPTCHA redirect"
+        if resp.status_code == 200 and any(m in resp.text[:20000] for m in CAPTCHA_MARKERS):
+            return "CAPTCHA page"
+    return None
+
+
+class UpstreamHealth:
+    """Throttling state of one upstream, driving its limiter."""
+
+    def __init__(
+        self,
+        limiter: TokenBucketLimiter,
+        empty_streak: int = 20,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        min_fraction: float = 0.1,
+        cooldown: float = 60.0,
+        max_cooldown: float = 900.0,
+    ):
+        """
+        Args:
+            limiter: the upstream's rate limiter
+            empty_streak: consecutive empty results treated as throttling (0 disables)
+            increase: fraction of the configured rate added back per success
+            decrease: factor the rate is multiplied by when throttled
+            min_fraction: the rate never drops below this fraction of the configured rate
+            cooldown: seconds the breaker stays open on the first trip
+            max_cooldown: cap on the doubled cooldown
+        """
+        self.limiter = limiter
+        self.empty_streak = empty_streak
+        self.increase = increase
+        self.decrease = decrease
+        self.min_fraction = min_fraction
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.trips = 0  # breaker trips since the upstream last fully recovered
+        self._empties = 0
+        self._counts = {"ok": 0, "empty": 0, "throttled": 0, "error": 0}
+        self.last_throttle: dict | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.limiter.paused_for() > 0
+
+    async def record(self, outcome: str, reason: str = ""):
+        """Report one upstream response: "ok", "empty", "throttled" or "error"."""
+        self._counts[outcome] += 1
+        if outcome == "ok":
+            self._empties = 0
+            await self._recover()
+        elif outcome == "empty":
+            self._empties += 1
+            if self.empty_streak and self._empties >= self.empty_streak:
+                self._empties = 0
+                await self._trip(f"{self.empty_streak} empty results in a row")
+        elif outcome == "throttled":
+            await self._trip(reason or "throttled")
+
+    async def _recover(self):
+        limiter = self.limiter
+        if limiter.rate < limiter.target_rate:
+            await limiter.set_rate(min(limiter.target_rate, limiter.rate + limiter.target_rate * self.increase))
+        elif self.trips:
+            self.trips = 0
+            logger.info(f"Upstream '{limiter.name}' recovered to {limiter.rate * 60:.1f}/min")
+
+    async def _trip(self, reason: str):
+        limiter = self.limiter
+        if self.is_open:
+            return  # already cooling down; responses to calls made before the trip
+        self.trips += 1
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** (self.trips - 1))
+        rate = max(limiter.target_rate * self.min_fraction, limiter.rate * self.decrease)
+        await limiter.throttle(rate, cooldown)
+        self.last_throttle = {"reason": reason, "at": time.time(), "cooldown": cooldown}
+        logger.warning(
+            f"Upstream '{limiter.name}' throttled ({reason}): pausing {cooldown:.0f}s, "
+            f"then {rate * 60:.1f}/min"
+        )
+
+    def status(self) -> dict:
+        limiter = self.limiter
+        if self.is_open:
+            state = "open"
+        elif limiter.rate < limiter.target_rate:
+            state = "recovering"
+        else:
+            state = "closed"
+        return {
+            "state": state,
+            "trips": self.trips,
+            "empty_streak": self._empties,
+            "responses": dict(self._counts),
+            "last_throttle": self.last_throttle,
+        }
+
+
+# Autocomplete legitimately returns nothing for a whole alphabet sweep (27
+# calls) of an obscure seed, so only a longer streak counts as throttling
+autocomplete_health = UpstreamHealth(autocomplete_limiter, empty_streak=40)
+trends_health = UpstreamHealth(trends_limiter, empty_streak=20, cooldown=120.0)
+serp_health = UpstreamHealth(serp_limiter, empty_streak=5, cooldown=120.0)
+competitor_health = UpstreamHealth(competitor_limiter, empty_streak=0)
+
+HEALTH = {
+    "autocomplete": autocomplete_health,
+    "trends": trends_health,
+    "serp": serp_health,
+    "competitor": competitor_health,
+}
@@ -0,0 +1,47 @@
+"""
+Standalone background worker: runs the job queue consumers and the scheduler
+without the web app, so crawls and expansions don't compete with API requests.
+Several workers can run side by side; they share the collection_jobs table.
+
+Usage: python -m backend.worker
+"""
+import asyncio
+import logging
+import os
+import signal
+
+# A separate worker always runs next to a web process, so upstream rate limits
+# must be shared; set before backend imports build the limiters
+os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+
+from backend.database import init_db, run_migrations
+from backend.models import *  # noqa: ensure all models registered
+from backend.services.google_trends import trends_sessions
+from backend.tasks.job_queue import job_queue
+from backend.tasks.scheduler import setup_scheduler, shutdown_scheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    await init_db()
+    await run_migrations()
+    await job_queue.start()
+    await setup_scheduler()
+    logger.info(f"Worker {job_queue.worker_id} started")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await shutdown_scheduler()
+    await job_queue.stop()
+    trends_sessions.shutdown()
+    logger.info(f"Worker {job_queue.worker_id} stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
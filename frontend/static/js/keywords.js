@@ -50,8 +50,8 @@ document.getElementById('expand-form').addEventListener('submit', async (e) => {
         const data = await resp.json();
 
         if (data.job_id) {
-            statusText.textContent = `Job #${data.job_id} started. Polling for results...`;
-            pollAndShowResults(data.job_id, seed);
+            statusText.textContent = `Job #${data.job_id} started. Waiting for results...`;
+            watchAndShowResults(data.job_id, seed);
         }
     } catch (err) {
         statusText.textContent = 'Error: ' + err.message;
@@ -60,47 +60,48 @@ document.getElementById('expand-form').addEventListener('submit', async (e) => {
     }
 });
 
-async function pollAndShowResults(jobId, seed) {
+function watchAndShowResults(jobId, seed) {
     const statusText = document.getElementById('expand-status-text');
     const btn = document.getElementById('expand-btn');
     const status = document.getElementById('expand-status');
 
-    let attempts = 0;
-    const maxAttempts = 120; // 2 minutes max
-
-    const poll = setInterval(async () => {
-        attempts++;
-        try {
-            const job = await fetch(`/api/jobs/${jobId}`).then(r => r.json());
-
-            if (job.status === 'completed') {
-                clearInterval(poll);
-                statusText.textContent = `Done! Found ${job.keywords_found} new keywords.`;
-                btn.disabled = false;
-                btn.textContent = 'Expand Keywords';
-                loadResults(seed);
-                setTimeout(() => status.classList.add('hidden'), 5000);
-            } else if (job.status === 'failed') {
-                clearInterval(poll);
-                statusText.textContent = `Failed: ${job.error_message || 'Unknown error'}`;
-                btn.disabled = false;
-                btn.textContent = 'Expand Keywords';
-            } else {
-                statusText.textContent = `Running... ${Math.round(job.progress)}%`;
-            }
-        } catch (e) {
-            // Job might not be tracked yet, keep polling
-        }
+    // One server-sent events stream instead of polling /api/jobs/{id}
+    const source = new EventSource(`/api/jobs/stream?ids=${jobId}`);
 
-        if (attempts >= maxAttempts) {
-            clearInterval(poll);
-            statusText.textContent = 'Job is taking longer than expected. Check the Jobs page.';
-            btn.disabled = false;
-            btn.textContent = 'Expand Keywords';
-            // Still try to show any results
+    const finish = () => {
+        clearTimeout(timeout);
+        source.close();
+        btn.disabled = false;
+        btn.textContent = 'Expand Keywords';
+    };
+
+    const timeout = setTimeout(() => {
+        finish();
+        statusText.textContent = 'Job is taking longer than expected. Check the Jobs page.';
+        // Still try to show any results
+        loadResults(seed);
+    }, 120000); // 2 minutes max
+
+    source.addEventListener('job', (e) => {
+        const job = JSON.parse(e.data);
+        if (job.status === 'completed') {
+            finish();
+            // A recently expanded seed completes at once, pointing at the run whose results stand
+            statusText.textContent = job.reused_job_id
+                ? `Done! Reused ${job.keywords_found} keywords from job #${job.reused_job_id} (expanded ${new Date(job.reused_at).toLocaleString()}).`
+                : `Done! Found ${job.keywords_found} new keywords.`;
             loadResults(seed);
+            setTimeout(() => status.classList.add('hidden'), 5000);
+        } else if (job.status === 'failed' || job.status === 'cancelled') {
+            finish();
+            statusText.textContent = `${job.status === 'failed' ? 'Failed' : 'Cancelled'}: ${job.error_message || 'Unknown error'}`;
+            // Partial results are kept when a job stops early
+            loadResults(seed);
+        } else if (job.progress !== undefined) {
+            statusText.textContent = `Running... ${Math.round(job.progress)}%`;
         }
-    }, 2000);
+    });
+    source.addEventListener('done', () => source.close());
 }
 
 async function loadResults(seed) {
@@ -19,9 +19,32 @@ async function loadTrending() {
     document.getElementById('trending-grid').classList.add('hidden');
 
     try {
-        const data = await fetch('/api/trends/trending-now').then(r => r.json());
-        trendingData = data;
-        renderTrending(data);
+        // Each source arrives as its own NDJSON line; render it as soon as it lands
+        const resp = await fetch('/api/trends/trending-now/stream');
+        const reader = resp.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        trendingData = { google: [], twitter: [], reddit: [] };
+        for (const source of ['google', 'twitter', 'reddit']) {
+            document.getElementById(`${source}-count`).textContent = '';
+            document.getElementById(`${source}-list`).innerHTML =
+                '<div class="px-5 py-8 text-center text-gray-400 text-sm animate-pulse">Loading...</div>';
+        }
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const msg = JSON.parse(line);
+                if (!msg.source) continue;
+                trendingData[msg.source] = msg.items;
+                showTrendingGrid();
+                renderSource(msg.source, msg.items, msg.status);
+            }
+        }
     } catch (e) {
         document.getElementById('loading-state').innerHTML =
             `<p class="col-span-3 text-center py-8 text-red-500">Failed to load trending data: ${e.message}</p>`;
@@ -30,20 +53,23 @@ async function loadTrending() {
     loadRecentKeywords();
 }
 
-function renderTrending(data) {
+function showTrendingGrid() {
     document.getElementById('loading-state').classList.add('hidden');
     document.getElementById('trending-grid').classList.remove('hidden');
     document.getElementById('trending-grid').classList.add('grid');
+}
 
-    renderSource('google', data.google || []);
-    renderSource('twitter', data.twitter || []);
-    renderSource('reddit', data.reddit || []);
+function formatAge(seconds) {
+    if (seconds < 60) return 'just now';
+    if (seconds < 3600) return `${Math.floor(seconds / 60)}m ago`;
+    return `${Math.floor(seconds / 3600)}h ago`;
 }
 
-function renderSource(source, items) {
+function renderSource(source, items, status) {
     const list = document.getElementById(`${source}-list`);
     const countEl = document.getElementById(`${source}-count`);
-    countEl.textContent = `${items.length} topics`;
+    const age = status && status.age_seconds != null ? ` · ${formatAge(status.age_seconds)}` : '';
+    countEl.textContent = `${items.length} topics${age}`;
 
     if (items.length === 0) {
         list.innerHTML = `<div class="px-5 py-8 text-center text-gray-400 text-sm">
@@ -180,39 +206,45 @@ async function expandAll() {
     }
 }
 
-// ─── Poll jobs until all done ─────────────────────────────────────────────────
+// ─── Watch jobs until all done ────────────────────────────────────────────────
 
-async function pollUntilDone(jobIds, label) {
+function pollUntilDone(jobIds, label) {
     const maxWait = 180; // 3 min
-    let attempts = 0;
+    const jobs = {};
 
     return new Promise((resolve) => {
-        const interval = setInterval(async () => {
-            attempts++;
-            try {
-                const results = await Promise.all(
-                    jobIds.map(id => fetch(`/api/jobs/${id}`).then(r => r.json()))
-                );
-                const done = results.filter(j => j.status === 'completed' || j.status === 'failed');
-                const totalFound = results.reduce((s, j) => s + (j.keywords_found || 0), 0);
-
-                if (done.length === results.length) {
-                    clearInterval(interval);
-                    showStatus(`Done! Discovered ${totalFound} new keywords from ${label}`, false, true);
-                    setTimeout(hideStatus, 6000);
-                    resolve();
-                } else {
-                    const avgProgress = results.reduce((s, j) => s + (j.progress || 0), 0) / results.length;
-                    showStatus(`Expanding ${label}... ${Math.round(avgProgress)}% (${done.length}/${results.length} done)`);
-                }
-            } catch (e) { /* keep polling */ }
-
-            if (attempts >= maxWait / 2) {
-                clearInterval(interval);
-                showStatus(`Jobs still running. Check <a href="/jobs" class="underline">Jobs page</a>.`);
-                resolve();
+        // One server-sent events stream for all jobs instead of a request per job per tick
+        const source = new EventSource(`/api/jobs/stream?ids=${jobIds.join(',')}`);
+
+        const finish = () => {
+            clearTimeout(timeout);
+            source.close();
+            resolve();
+        };
+
+        const timeout = setTimeout(() => {
+            showStatus(`Jobs still running. Check <a href="/jobs" class="underline">Jobs page</a>.`);
+            finish();
+        }, maxWait * 1000);
+
+        source.addEventListener('job', (e) => {
+            const event = JSON.parse(e.data);
+            jobs[event.id] = { ...(jobs[event.id] || {}), ...event };
+
+            const results = jobIds.map(id => jobs[id] || {});
+            const done = results.filter(j => ['completed', 'failed', 'cancelled'].includes(j.status));
+            const totalFound = results.reduce((s, j) => s + (j.keywords_found || 0), 0);
+
+            if (done.length === results.length) {
+                showStatus(`Done! Discovered ${totalFound} new keywords from ${label}`, false, true);
+                setTimeout(hideStatus, 6000);
+                finish();
+            } else {
+                const avgProgress = results.reduce((s, j) => s + (j.progress || 0), 0) / results.length;
+                showStatus(`Expanding ${label}... ${Math.round(avgProgress)}% (${done.length}/${results.length} done)`);
             }
-        }, 2000);
+        });
+        source.addEventListener('done', finish);
     });
 }
 